@@ -3,6 +3,7 @@ Settings for overseas stock asset management system (Korea Investment & Securiti
 All sensitive values are loaded from .env file.
 """
 
+from functools import lru_cache
 from pathlib import Path
 from pydantic_settings import BaseSettings
 
@@ -30,9 +31,20 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASSWORD: str
     DB_NAME: str = "asset_us"
+    DB_POOL_SIZE: int = 5  # 풀에 유지할 최대 유휴 커넥션 수
 
     model_config = {
         "env_file": str(BASE_DIR / ".env"),
         "env_file_encoding": "utf-8",
         "extra": "ignore",
     }
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the process-wide Settings instance.
+
+    The .env file is parsed and validated once; later calls reuse the result.
+    """
+    return Settings()
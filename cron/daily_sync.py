@@ -4,6 +4,12 @@ Daily synchronization script for US stock asset management system.
 Syncs all data from Korea Investment Securities API to database.
 
 This script is idempotent - safe to run multiple times.
+All database steps run in a single transaction: a failure part-way through
+rolls back, so no partial snapshot is left behind.
+Completed steps are recorded in sync_state; re-running for the same date
+skips them unless --force is given.
+--from-cache runs replay recorded KIS responses, which carry no date, so they
+run every step and then roll back: nothing is saved and sync_state is untouched.
 
 IMPORTANT: Dates use US Eastern time (not Korean time) because
 KIS API returns trade dates in US local time (현지시각 기준).
@@ -15,11 +21,17 @@ Recommended cron schedule (using US Eastern time to auto-handle DST):
 Usage:
     python cron/daily_sync.py              # Sync today's data (US ET)
     python cron/daily_sync.py --date 2026-02-04  # Sync specific date
+    python cron/daily_sync.py --parallel   # Fetch market index alongside KIS sync
+    python cron/daily_sync.py --force      # Re-run steps already completed today
+    python cron/daily_sync.py --record     # Also save KIS responses for --from-cache (dev)
+    python cron/daily_sync.py --from-cache # Replay last recorded KIS responses (dev)
 """
 
 import argparse
+import logging
 import sys
-from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
@@ -31,133 +43,272 @@ PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 from db.connection import get_connection
-from services.kis_service import KISAPIClient
+from db.schema_loader import load_schema_statements
+from services.kis_service import CachedKISClient, KISAPIClient
 from services.data_sync_service import (
     sync_trade_history_from_kis,
     sync_holdings_from_kis,
     sync_account_summary_from_kis,
 )
-from services.lot_service import rebuild_daily_lots, update_lot_metrics
+from services.lot_service import rebuild_daily_lots, update_lot_metrics_bulk
 from services.portfolio_service import create_portfolio_snapshot, create_daily_portfolio_snapshot
 from services.market_index_service import sync_market_index
 
+logger = logging.getLogger("daily_sync")
 
-def daily_sync(target_date: date = None):
+
+def _sync_market_index_on_own_connection(target_date: date) -> int:
+    """Sync market index using a separate connection (for --parallel)."""
+    conn = get_connection()
+    try:
+        return sync_market_index(conn, start_date=target_date, end_date=target_date)
+    finally:
+        conn.close()
+
+
+def _ensure_sync_state_table(conn):
+    """
+    Create sync_state if it is missing.
+
+    Databases set up before the table existed never ran its schema file, and
+    daily_sync does not call init_database. The DDL is IF NOT EXISTS, so this
+    is a no-op once the table is there (it does commit implicitly, so call it
+    before any other work).
+    """
+    with conn.cursor() as cur:
+        for statement in load_schema_statements("schema_sync_state.sql"):
+            cur.execute(statement)
+
+
+def _load_completed_phases(conn, target_date: date) -> set:
+    """Return the daily_sync phase numbers already completed for target_date."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT phase FROM sync_state WHERE target_date = %s", (target_date,))
+        return {row[0] for row in cur.fetchall()}
+
+
+def _mark_phase_completed(conn, target_date: date, phase: int):
+    """Record a completed phase (committed together with the phase's own writes)."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO sync_state (target_date, phase, completed_at)
+            VALUES (%s, %s, NOW())
+            ON DUPLICATE KEY UPDATE completed_at = NOW()
+            """,
+            (target_date, phase),
+        )
+
+
+def daily_sync(
+    target_date: date = None,
+    parallel: bool = False,
+    force: bool = False,
+    from_cache: bool = False,
+    record: bool = False,
+):
     """
     Run daily synchronization for all data.
 
     Args:
         target_date: Date to sync. If None, uses US Eastern time today.
                      (KIS API uses US local time for trade dates)
+        parallel: Fetch market index (yfinance) concurrently with the KIS
+                  steps. It then uses its own connection and commits
+                  separately from the main transaction.
+        force: Re-run every step even if sync_state says it already
+               completed for target_date.
+        from_cache: Replay the last recorded KIS responses instead of
+                    calling the API (development/debug runs). The run is
+                    rolled back at the end and sync_state is not used.
+        record: Save the KIS responses of this run for a later --from-cache run.
     """
+    # Read the clock once; the local (KST) time is derived from the same instant
+    now_et = datetime.now(ET)
+    now_local = now_et.astimezone()
+
     if target_date is None:
         # Use US Eastern time - KIS API returns dates in US local time
-        target_date = datetime.now(ET).date()
+        target_date = now_et.date()
         # 주말이면 직전 금요일로 자동 보정
         # (cron 요일 필터 대신 스크립트에서 처리 - TZ 미지원 cron 대응)
-        from datetime import timedelta
         while target_date.weekday() >= 5:
             target_date -= timedelta(days=1)
 
-    print("=" * 80)
-    print(f"Daily Sync (US Stocks) - {target_date}")
-    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} KST")
-    print(f"           {datetime.now(ET).strftime('%Y-%m-%d %H:%M:%S')} ET")
-    print("=" * 80)
+    logger.info("=" * 80)
+    logger.info(f"Daily Sync (US Stocks) - {target_date}")
+    logger.info(f"Started at: {now_local.strftime('%Y-%m-%d %H:%M:%S')} KST")
+    logger.info(f"           {now_et.strftime('%Y-%m-%d %H:%M:%S')} ET")
+    logger.info("=" * 80)
 
-    # Refresh access token before any API calls
-    # (token may have expired if auto_trade.py is not running)
-    client = KISAPIClient()
-    client._access_token = None
-    client._token_expired = None
-    token = client.get_access_token()
-    print(f"[TOKEN] Refreshed (expires: {client._token_expired})")
+    if from_cache:
+        client = CachedKISClient()
+        logger.info("[CACHE] Using recorded KIS responses (no API calls)")
+    else:
+        # Refresh access token before any API calls
+        # (token may have expired if auto_trade.py is not running)
+        client = KISAPIClient(record=record)
+        client._access_token = None
+        client._token_expired = None
+        token = client.get_access_token()
+        logger.info(f"[TOKEN] Refreshed (expires: {client._token_expired})")
 
     conn = get_connection()
+    index_pool = None
+    index_future = None
+    completed = set()
+
+    def run_phase(phase: int, title: str, label: str, step):
+        logger.info(f"\n[{phase}/8] {title}...")
+        if phase in completed:
+            logger.info("      Skipped (already completed)")
+            return
+        logger.info(f"      {label}: {step()}")
+        if not from_cache:
+            _mark_phase_completed(conn, target_date, phase)
 
     try:
+        # 재실행 모드는 sync_state를 읽지도 쓰지도 않음 (실제 cron 실행이 건너뛰지 않도록)
+        if not from_cache:
+            _ensure_sync_state_table(conn)
+            if force:
+                with conn.cursor() as cur:
+                    cur.execute("DELETE FROM sync_state WHERE target_date = %s", (target_date,))
+            completed = _load_completed_phases(conn, target_date)
+
+        # 시장지수는 KIS 데이터와 무관한 테이블이므로 병렬 모드에서는 먼저 시작
+        # (별도 커넥션에서 커밋하므로 롤백되는 재실행 모드에서는 사용하지 않음)
+        if parallel and not from_cache and 8 not in completed:
+            index_pool = ThreadPoolExecutor(max_workers=1)
+            index_future = index_pool.submit(_sync_market_index_on_own_connection, target_date)
+
         # 1. Sync trade history (last 3 days to catch missed trades)
         #    KIS API returns trades in US local time; syncing 3 days ensures
         #    no trades are missed due to KST/ET timezone differences.
-        from datetime import timedelta
-        sync_start = (target_date - timedelta(days=2)).strftime("%Y%m%d")
-        sync_end = target_date.strftime("%Y%m%d")
-
-        print(f"\n[1/8] Syncing trade history ({sync_start} ~ {sync_end})...")
-        trade_count = sync_trade_history_from_kis(
-            conn,
-            start_date=sync_start,
-            end_date=sync_end,
+        sync_start = target_date - timedelta(days=2)
+        sync_end = target_date
+
+        run_phase(
+            1, f"Syncing trade history ({sync_start:%Y%m%d} ~ {sync_end:%Y%m%d})", "Trade records",
+            lambda: sync_trade_history_from_kis(
+                conn, client, start_date=sync_start, end_date=sync_end, commit=False
+            ),
         )
-        print(f"      Trade records: {trade_count}")
 
         # 2. Sync holdings (for current prices only)
-        print("\n[2/8] Syncing holdings...")
-        holdings_count = sync_holdings_from_kis(conn, snapshot_date=target_date)
-        print(f"      Holdings records: {holdings_count}")
+        run_phase(
+            2, "Syncing holdings", "Holdings records",
+            lambda: sync_holdings_from_kis(conn, client, snapshot_date=target_date, commit=False),
+        )
 
         # 3. Sync account summary (cash + stock value)
-        print("\n[3/8] Syncing account summary...")
-        summary_count = sync_account_summary_from_kis(conn, client, snapshot_date=target_date)
-        print(f"      Summary records: {summary_count}")
+        run_phase(
+            3, "Syncing account summary", "Summary records",
+            lambda: sync_account_summary_from_kis(conn, client, snapshot_date=target_date, commit=False),
+        )
 
         # 4. Rebuild daily lots from trade history (source of truth)
         #    Clears all lots and reconstructs from account_trade_history.
-        print("\n[4/8] Rebuilding daily lots from trade history...")
-        open_lots = rebuild_daily_lots(conn)
-        print(f"      Open lots: {open_lots}")
+        run_phase(
+            4, "Rebuilding daily lots from trade history", "Open lots",
+            lambda: rebuild_daily_lots(conn, commit=False),
+        )
 
         # 5. Update lot metrics (current price, unrealized PnL)
-        print("\n[5/8] Updating lot metrics...")
-        lot_count = update_lot_metrics(conn, target_date)
-        print(f"      Lots updated: {lot_count}")
+        run_phase(
+            5, "Updating lot metrics", "Lots updated",
+            lambda: update_lot_metrics_bulk(conn, target_date, commit=False),
+        )
 
         # 6. Create portfolio snapshot (per-position)
-        print("\n[6/8] Creating portfolio snapshot...")
-        portfolio_count = create_portfolio_snapshot(conn, target_date)
-        print(f"      Portfolio positions: {portfolio_count}")
+        run_phase(
+            6, "Creating portfolio snapshot", "Portfolio positions",
+            lambda: create_portfolio_snapshot(conn, target_date, commit=False),
+        )
 
         # 7. Create daily portfolio snapshot (summary for TWR/MWR)
-        print("\n[7/8] Creating daily portfolio summary...")
-        daily_snapshot_ok = create_daily_portfolio_snapshot(conn, target_date)
-        print(f"      Summary snapshot: {'created' if daily_snapshot_ok else 'skipped'}")
+        run_phase(
+            7, "Creating daily portfolio summary", "Summary snapshot",
+            lambda: "created" if create_daily_portfolio_snapshot(conn, target_date, commit=False) else "skipped",
+        )
 
         # 8. Sync market index (S&P 500, NASDAQ)
-        print("\n[8/8] Syncing market index...")
+        #    Failure is non-fatal; the phase stays incomplete so the next run retries it.
+        def sync_index():
+            if index_future is not None:
+                return index_future.result()
+            return sync_market_index(conn, start_date=target_date, end_date=target_date, commit=False)
+
         try:
-            index_count = sync_market_index(conn, start_date=target_date, end_date=target_date)
-            print(f"      Index records: {index_count}")
+            run_phase(8, "Syncing market index", "Index records", sync_index)
         except Exception as e:
-            print(f"      Warning: Market index sync failed: {e}")
+            logger.warning(f"      Warning: Market index sync failed: {e}")
+
+        if from_cache:
+            # 녹화된 응답에는 날짜가 없으므로 target_date 데이터로 저장하지 않음
+            conn.rollback()
+            logger.info("\n[CACHE] Replay run rolled back (nothing saved)")
+        else:
+            # Commit all steps at once
+            conn.commit()
 
-        print("\n" + "=" * 80)
-        print(f"Daily Sync Complete!")
-        print(f"Finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("=" * 80)
+        logger.info("\n" + "=" * 80)
+        logger.info(f"Daily Sync Complete!")
+        logger.info(f"Finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info("=" * 80)
 
     except Exception as e:
-        print(f"\n[ERROR] Daily sync failed: {e}")
-        import traceback
-        traceback.print_exc()
+        conn.rollback()
+        logger.exception(f"\n[ERROR] Daily sync failed: {e}")
         sys.exit(1)
     finally:
+        if index_pool is not None:
+            index_pool.shutdown(wait=True)
         conn.close()
 
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     parser = argparse.ArgumentParser(description="Daily sync for US stock asset management")
     parser.add_argument(
         "--date",
         type=str,
         help="Target date (YYYY-MM-DD). Default: today",
     )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Fetch market index data concurrently with the KIS sync",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run steps already recorded as completed for the date",
+    )
+    parser.add_argument(
+        "--from-cache",
+        action="store_true",
+        help="Replay the last recorded KIS API responses instead of calling the API",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Save this run's KIS API responses for a later --from-cache run",
+    )
     args = parser.parse_args()
 
     target_date = None
     if args.date:
         target_date = datetime.strptime(args.date, "%Y-%m-%d").date()
 
-    daily_sync(target_date)
+    daily_sync(
+        target_date,
+        parallel=args.parallel,
+        force=args.force,
+        from_cache=args.from_cache,
+        record=args.record,
+    )
 
 
 if __name__ == "__main__":
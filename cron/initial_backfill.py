@@ -14,10 +14,14 @@ This script:
 Usage:
     python cron/initial_backfill.py
     python cron/initial_backfill.py --start-date 2026-01-02
+    python cron/initial_backfill.py --record      # Also save KIS responses for --from-cache (dev)
+    python cron/initial_backfill.py --from-cache  # Replay last recorded KIS responses (dev)
 """
 
 import argparse
+import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime, timedelta
 from pathlib import Path
 
@@ -27,154 +31,197 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 from db.connection import get_connection
 from scripts.init_database import init_database
+from services.kis_service import CachedKISClient, KISAPIClient
 from services.data_sync_service import (
     sync_trade_history_from_kis,
     sync_holdings_from_kis,
     sync_account_summary_from_kis,
 )
-from services.lot_service import rebuild_daily_lots, update_lot_metrics
+from services.lot_service import rebuild_daily_lots, update_lot_metrics_bulk
 from services.portfolio_service import create_portfolio_snapshot, create_daily_portfolio_snapshot
 from services.market_index_service import sync_market_index
 
+logger = logging.getLogger("initial_backfill")
 
-def backfill_daily_portfolio_snapshots(conn, start_date: date, end_date: date) -> int:
+
+def _snapshot_one(snapshot_date: date) -> tuple:
+    """Create one day's snapshot on its own pooled connection."""
+    conn = get_connection()
+    try:
+        return snapshot_date, create_daily_portfolio_snapshot(conn, snapshot_date), None
+    except Exception as e:
+        return snapshot_date, False, e
+    finally:
+        conn.close()
+
+
+def backfill_daily_portfolio_snapshots(start_date: date, end_date: date, max_workers: int = 8) -> int:
     """
     Backfill daily_portfolio_snapshot for date range.
     Uses holdings data to reconstruct historical snapshots.
+
+    Only weekdays are attempted (US market is closed on weekends). Each
+    day's snapshot is independent, so days are processed concurrently
+    (one pooled connection per worker). Progress is printed in date order
+    once all workers finish.
     """
-    count = 0
-    current = start_date
+    all_days = (start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1))
+    dates = [d for d in all_days if d.weekday() < 5]
 
-    while current <= end_date:
-        try:
-            if create_daily_portfolio_snapshot(conn, current):
-                count += 1
-                print(f"    Created snapshot for {current}")
-        except Exception as e:
-            print(f"    Warning: Failed to create snapshot for {current}: {e}")
-        current += timedelta(days=1)
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_snapshot_one, d) for d in dates]
+        for future in as_completed(futures):
+            results.append(future.result())
+
+    count = 0
+    for snapshot_date, ok, error in sorted(results, key=lambda r: r[0]):
+        if error is not None:
+            logger.warning(f"    Warning: Failed to create snapshot for {snapshot_date}: {error}")
+        elif ok:
+            count += 1
+            logger.info(f"    Created snapshot for {snapshot_date}")
 
     return count
 
 
-def initial_backfill(start_date: date):
+def initial_backfill(start_date: date, from_cache: bool = False, record: bool = False):
     """
     Run initial backfill for all historical data.
 
     Args:
         start_date: Start date for backfill
+        from_cache: Replay the last recorded KIS responses instead of
+                    calling the API (development/debug runs). Nothing is
+                    committed; the run is rolled back at the end.
+        record: Save the KIS responses of this run for a later --from-cache run
     """
     end_date = date.today()
 
-    print("=" * 80)
-    print("INITIAL BACKFILL (US Stocks)")
-    print(f"Date range: {start_date} ~ {end_date}")
-    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 80)
+    logger.info("=" * 80)
+    logger.info("INITIAL BACKFILL (US Stocks)")
+    logger.info(f"Date range: {start_date} ~ {end_date}")
+    logger.info(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info("=" * 80)
 
     # Step 1: Initialize database tables
-    print("\n[STEP 1] Initializing database tables...")
+    logger.info("\n[STEP 1] Initializing database tables...")
     init_database()
 
+    client = CachedKISClient() if from_cache else KISAPIClient(record=record)
     conn = get_connection()
+    # 녹화된 응답에는 날짜가 없으므로 재실행 모드에서는 커밋하지 않고 마지막에 롤백
+    commit = not from_cache
 
     try:
         # Step 2: Sync all trade history
-        print("\n[STEP 2] Syncing trade history...")
+        logger.info("\n[STEP 2] Syncing trade history...")
         trade_count = sync_trade_history_from_kis(
             conn,
-            start_date=start_date.strftime("%Y%m%d")
+            client,
+            start_date=start_date,
+            commit=commit,
         )
-        print(f"         Total trades: {trade_count}")
+        logger.info(f"         Total trades: {trade_count}")
 
         # Step 3: Sync current holdings
-        print("\n[STEP 3] Syncing current holdings...")
-        holdings_count = sync_holdings_from_kis(conn)
-        print(f"         Holdings: {holdings_count}")
+        logger.info("\n[STEP 3] Syncing current holdings...")
+        holdings_count = sync_holdings_from_kis(conn, client, commit=commit)
+        logger.info(f"         Holdings: {holdings_count}")
 
         # Step 4: Sync account summary
-        print("\n[STEP 4] Syncing account summary...")
-        summary_count = sync_account_summary_from_kis(conn)
-        print(f"         Summary: {summary_count}")
+        logger.info("\n[STEP 4] Syncing account summary...")
+        summary_count = sync_account_summary_from_kis(conn, client, commit=commit)
+        logger.info(f"         Summary: {summary_count}")
 
         # Step 5: Rebuild daily lots from trade history
-        print("\n[STEP 5] Rebuilding daily lots...")
-        rebuild_daily_lots(conn)
-        print("         Lots rebuilt")
+        logger.info("\n[STEP 5] Rebuilding daily lots...")
+        rebuild_daily_lots(conn, commit=commit)
+        logger.info("         Lots rebuilt")
 
         # Step 6: Update lot metrics
-        print("\n[STEP 6] Updating lot metrics...")
-        lot_count = update_lot_metrics(conn, end_date)
-        print(f"         Lots updated: {lot_count}")
+        logger.info("\n[STEP 6] Updating lot metrics...")
+        lot_count = update_lot_metrics_bulk(conn, end_date, commit=commit)
+        logger.info(f"         Lots updated: {lot_count}")
 
         # Step 7: Create portfolio snapshot (today)
-        print("\n[STEP 7] Creating portfolio snapshot (today)...")
-        portfolio_count = create_portfolio_snapshot(conn, end_date)
-        print(f"         Portfolio positions: {portfolio_count}")
+        logger.info("\n[STEP 7] Creating portfolio snapshot (today)...")
+        portfolio_count = create_portfolio_snapshot(conn, end_date, commit=commit)
+        logger.info(f"         Portfolio positions: {portfolio_count}")
 
         # Step 8: Create daily portfolio snapshot (today)
-        print("\n[STEP 8] Creating daily portfolio summary...")
-        create_daily_portfolio_snapshot(conn, end_date)
-        print("         Summary created")
+        logger.info("\n[STEP 8] Creating daily portfolio summary...")
+        create_daily_portfolio_snapshot(conn, end_date, commit=commit)
+        logger.info("         Summary created")
 
         # Step 9: Sync market index (S&P 500, NASDAQ)
-        print("\n[STEP 9] Syncing market index (S&P 500/NASDAQ)...")
+        logger.info("\n[STEP 9] Syncing market index (S&P 500/NASDAQ)...")
         try:
-            index_count = sync_market_index(conn, start_date=start_date, end_date=end_date)
-            print(f"         Index records: {index_count}")
+            index_count = sync_market_index(conn, start_date=start_date, end_date=end_date, commit=commit)
+            logger.info(f"         Index records: {index_count}")
         except Exception as e:
-            print(f"         Warning: Market index sync failed: {e}")
-            print("         You may need to install yfinance: pip install yfinance")
+            logger.warning(f"         Warning: Market index sync failed: {e}")
+            logger.info("         You may need to install yfinance: pip install yfinance")
             index_count = 0
 
-        # Get actual counts from DB
-        with conn.cursor() as cur:
-            cur.execute("SELECT COUNT(*) FROM account_trade_history")
-            trade_count = cur.fetchone()[0]
-            cur.execute("SELECT COUNT(*) FROM holdings WHERE snapshot_date = %s", (end_date,))
-            holdings_count = cur.fetchone()[0]
-            cur.execute("SELECT COUNT(*) FROM daily_lots")
-            lot_count = cur.fetchone()[0]
-            cur.execute("SELECT COUNT(*) FROM portfolio_snapshot")
-            portfolio_count = cur.fetchone()[0]
-
-            # Check if new tables exist
-            try:
-                cur.execute("SELECT COUNT(*) FROM daily_portfolio_snapshot")
-                daily_snapshot_count = cur.fetchone()[0]
-            except:
-                daily_snapshot_count = 0
-
-            try:
-                cur.execute("SELECT COUNT(*) FROM market_index")
-                index_count = cur.fetchone()[0]
-            except:
-                index_count = 0
-
-        print("\n" + "=" * 80)
-        print("INITIAL BACKFILL COMPLETE!")
-        print(f"Finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("=" * 80)
+        # Get actual counts from DB (one round-trip; all tables exist after STEP 1)
+        # Read-only, so use an autocommit connection instead of opening a transaction
+        # (재실행 모드는 커밋 전이므로 같은 커넥션에서 읽어야 결과가 보임)
+        read_conn = conn if from_cache else get_connection(autocommit=True)
+        try:
+            with read_conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT 'trades', COUNT(*) FROM account_trade_history
+                    UNION ALL SELECT 'holdings', COUNT(*) FROM holdings WHERE snapshot_date = %s
+                    UNION ALL SELECT 'lots', COUNT(*) FROM daily_lots
+                    UNION ALL SELECT 'portfolio', COUNT(*) FROM portfolio_snapshot
+                    UNION ALL SELECT 'daily_snapshot', COUNT(*) FROM daily_portfolio_snapshot
+                    UNION ALL SELECT 'market_index', COUNT(*) FROM market_index
+                    """,
+                    (end_date,),
+                )
+                counts = dict(cur.fetchall())
+        finally:
+            if read_conn is not conn:
+                read_conn.close()
+
+        trade_count = counts["trades"]
+        holdings_count = counts["holdings"]
+        lot_count = counts["lots"]
+        portfolio_count = counts["portfolio"]
+        daily_snapshot_count = counts["daily_snapshot"]
+        index_count = counts["market_index"]
+
+        logger.info("\n" + "=" * 80)
+        logger.info("INITIAL BACKFILL COMPLETE!")
+        logger.info(f"Finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info("=" * 80)
 
         # Summary (actual DB counts)
-        print("\nSummary (DB counts):")
-        print(f"  - Trade history: {trade_count} records")
-        print(f"  - Holdings (today): {holdings_count} records")
-        print(f"  - Lots: {lot_count} records")
-        print(f"  - Portfolio positions: {portfolio_count} records")
-        print(f"  - Daily snapshots: {daily_snapshot_count} records")
-        print(f"  - Market index: {index_count} records")
+        logger.info("\nSummary (DB counts):")
+        logger.info(f"  - Trade history: {trade_count} records")
+        logger.info(f"  - Holdings (today): {holdings_count} records")
+        logger.info(f"  - Lots: {lot_count} records")
+        logger.info(f"  - Portfolio positions: {portfolio_count} records")
+        logger.info(f"  - Daily snapshots: {daily_snapshot_count} records")
+        logger.info(f"  - Market index: {index_count} records")
+
+        if from_cache:
+            conn.rollback()
+            logger.info("\n[CACHE] Replay run rolled back (nothing saved)")
 
     except Exception as e:
-        print(f"\n[ERROR] Initial backfill failed: {e}")
-        import traceback
-        traceback.print_exc()
+        conn.rollback()
+        logger.exception(f"\n[ERROR] Initial backfill failed: {e}")
         sys.exit(1)
     finally:
         conn.close()
 
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     parser = argparse.ArgumentParser(description="Initial backfill for US stock asset management")
     parser.add_argument(
         "--start-date",
@@ -182,10 +229,20 @@ def main():
         default="2026-01-02",
         help="Start date for backfill (YYYY-MM-DD). Default: 2026-01-02",
     )
+    parser.add_argument(
+        "--from-cache",
+        action="store_true",
+        help="Replay the last recorded KIS API responses instead of calling the API",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Save this run's KIS API responses for a later --from-cache run",
+    )
     args = parser.parse_args()
 
     start_date = datetime.strptime(args.start_date, "%Y-%m-%d").date()
-    initial_backfill(start_date)
+    initial_backfill(start_date, from_cache=args.from_cache, record=args.record)
 
 
 if __name__ == "__main__":
@@ -12,6 +12,7 @@ Usage:
 """
 
 import argparse
+import logging
 import subprocess
 import sys
 from datetime import datetime
@@ -26,19 +27,23 @@ from db.connection import get_connection
 
 NOTEBOOK = PROJECT_ROOT / "notebooks" / "portfolio_analysis.ipynb"
 
+logger = logging.getLogger("run_notebook")
+
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     parser = argparse.ArgumentParser(description="Run portfolio notebook (trading days only)")
     parser.add_argument("--force", action="store_true", help="거래일 여부 무시하고 강제 실행")
     args = parser.parse_args()
 
     today_et = datetime.now(ET).date()
-    print(f"[run_notebook] {today_et} (ET)")
+    logger.info(f"[run_notebook] {today_et} (ET)")
 
     if not args.force:
         # 1. 주말 skip
         if today_et.weekday() >= 5:
-            print(f"[SKIP] 주말 ({today_et}, weekday={today_et.weekday()}). 노트북 실행 안 함.")
+            logger.info(f"[SKIP] 주말 ({today_et}, weekday={today_et.weekday()}). 노트북 실행 안 함.")
             return
 
         # 2. 비거래일(공휴일) skip — market_index 기준
@@ -54,11 +59,11 @@ def main():
             conn.close()
 
         if count == 0:
-            print(f"[SKIP] 비거래일 ({today_et}). market_index 없음 → 공휴일 또는 데이터 없음.")
+            logger.info(f"[SKIP] 비거래일 ({today_et}). market_index 없음 → 공휴일 또는 데이터 없음.")
             return
 
     # 3. 노트북 실행
-    print(f"[RUN] 노트북 실행 시작...")
+    logger.info(f"[RUN] 노트북 실행 시작...")
     result = subprocess.run(
         [
             sys.executable, "-m", "jupyter", "nbconvert",
@@ -72,9 +77,9 @@ def main():
     )
 
     if result.returncode == 0:
-        print(f"[OK] 노트북 실행 완료. 이미지 저장됨: notebooks/images/")
+        logger.info(f"[OK] 노트북 실행 완료. 이미지 저장됨: notebooks/images/")
     else:
-        print(f"[ERROR] 노트북 실행 실패 (return code: {result.returncode})")
+        logger.error(f"[ERROR] 노트북 실행 실패 (return code: {result.returncode})")
         sys.exit(result.returncode)
 
 
@@ -1,20 +1,61 @@
+import threading
+
 import pymysql
-from config.settings import Settings
+from dbutils.pooled_db import PooledDB
+from config.settings import Settings, get_settings
+
+# 프로세스 전역 커넥션 풀 (autocommit 모드별, 최초 get_connection() 호출 시 생성)
+_pools = {}
+_pool_lock = threading.Lock()
+
 
+def _get_pool(settings: Settings, autocommit: bool) -> PooledDB:
+    """Create the shared connection pool for the given autocommit mode on first use."""
+    pool = _pools.get(autocommit)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(autocommit)
+            if pool is None:
+                pool = _pools[autocommit] = PooledDB(
+                    creator=pymysql,
+                    maxcached=settings.DB_POOL_SIZE,
+                    maxconnections=20,  # 상한 도달 시 반납될 때까지 대기 (blocking)
+                    blocking=True,
+                    ping=1,  # 체크아웃 시 끊어진 커넥션 재연결
+                    host=settings.DB_HOST,
+                    port=settings.DB_PORT,
+                    user=settings.DB_USER,
+                    password=settings.DB_PASSWORD,
+                    database=settings.DB_NAME,
+                    charset="utf8mb4",
+                    autocommit=autocommit,
+                )
+    return pool
 
-def get_connection(database=None):
+
+def get_connection(database=None, autocommit=False):
     """
     Get a database connection to the asset_us database or specified database.
 
+    Connections to the default database are checked out from a shared pool;
+    calling close() on them returns the connection to the pool instead of
+    tearing down the socket.
+
     Args:
-        database: Optional database name. If None, uses Settings().DB_NAME
+        database: Optional database name. If None, uses settings DB_NAME
+        autocommit: Use autocommit mode (for read-only work that should not
+                    hold a transaction snapshot open). Writes should keep
+                    the default so batches stay transactional.
 
     Returns:
-        pymysql.connections.Connection
+        pymysql.connections.Connection (pooled wrapper for the default database)
     """
-    settings = Settings()
+    settings = get_settings()
     db_name = database if database is not None else settings.DB_NAME
 
+    if db_name == settings.DB_NAME:
+        return _get_pool(settings, autocommit).connection()
+
     return pymysql.connect(
         host=settings.DB_HOST,
         port=settings.DB_PORT,
@@ -22,5 +63,5 @@ def get_connection(database=None):
         password=settings.DB_PASSWORD,
         database=db_name,
         charset="utf8mb4",
-        autocommit=False,
+        autocommit=autocommit,
     )
@@ -0,0 +1,38 @@
+from pathlib import Path
+from typing import List
+
+# db/*.sql 스키마 파일 위치
+SCHEMA_DIR = Path(__file__).resolve().parent
+
+
+def strip_comments(statement: str) -> str:
+    """Remove full-line '--' comments from a SQL statement."""
+    lines = [line for line in statement.splitlines() if not line.strip().startswith("--")]
+    return "\n".join(lines).strip()
+
+
+def load_schema_statements(schema_file: str) -> List[str]:
+    """
+    Read a schema file from db/ and return its DDL statements.
+
+    Comments and empty chunks are dropped, as are USE and CREATE DATABASE
+    statements (callers are already connected to the target database).
+
+    Args:
+        schema_file: File name inside db/, e.g. "schema_sync_state.sql"
+
+    Returns:
+        Statements without trailing semicolons, in file order
+    """
+    with open(SCHEMA_DIR / schema_file, "r", encoding="utf-8") as f:
+        schema_sql = f.read()
+
+    statements = []
+    for chunk in schema_sql.split(";"):
+        statement = strip_comments(chunk)
+        if not statement:
+            continue
+        if statement.upper().startswith(("CREATE DATABASE", "USE ")):
+            continue
+        statements.append(statement)
+    return statements
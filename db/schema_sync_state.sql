@@ -0,0 +1,13 @@
+-- Daily sync progress table
+-- Records which daily_sync phases completed for each target date,
+-- so a cron retry can skip work that already succeeded.
+
+USE asset_us;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    target_date DATE NOT NULL COMMENT '동기화 대상 일자',
+    phase TINYINT NOT NULL COMMENT 'daily_sync 단계 번호 (1~8)',
+    completed_at DATETIME NOT NULL COMMENT '완료 시각',
+
+    PRIMARY KEY (target_date, phase)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='daily_sync 단계별 완료 기록';
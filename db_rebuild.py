@@ -8,7 +8,10 @@ Usage:
     python db_rebuild.py sync                  - 증분 동기화
     python db_rebuild.py fix-cash [start_date] - 과거 현금 잔고 역산 (기본: 20260201)
 """
+import argparse
+import logging
 import sys
+
 from services.data_sync_service import (
     rebuild_all_data,
     show_db_status,
@@ -18,23 +21,31 @@ from services.data_sync_service import (
 
 
 def main():
-    if len(sys.argv) > 1:
-        cmd = sys.argv[1]
-        if cmd == "rebuild":
-            start_date = sys.argv[2] if len(sys.argv) > 2 else "20260201"
-            rebuild_all_data(start_date)
-        elif cmd == "status":
-            show_db_status()
-        elif cmd == "sync":
-            sync_all()
-        elif cmd == "fix-cash":
-            start_date = sys.argv[2] if len(sys.argv) > 2 else "20260201"
-            reconstruct_historical_cash(start_date)
-        else:
-            print(__doc__)
-    else:
+    parser = argparse.ArgumentParser(description="DB 재구성 CLI 도구")
+    subparsers = parser.add_subparsers(dest="cmd")
+
+    rebuild = subparsers.add_parser("rebuild", help="전체 DB 재구성")
+    rebuild.add_argument("start_date", nargs="?", default="20260201", help="시작 날짜 (YYYYMMDD)")
+    subparsers.add_parser("status", help="현재 DB 상태 확인")
+    subparsers.add_parser("sync", help="증분 동기화")
+    fix_cash = subparsers.add_parser("fix-cash", help="과거 현금 잔고 역산")
+    fix_cash.add_argument("start_date", nargs="?", default="20260201", help="시작 날짜 (YYYYMMDD)")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
+    # 알 수 없는 명령은 argparse가 에러로 종료 (재구성이 잘못 실행되지 않음)
+    commands = {
+        "rebuild": lambda: rebuild_all_data(args.start_date),
+        "status": show_db_status,
+        "sync": sync_all,
+        "fix-cash": lambda: reconstruct_historical_cash(args.start_date),
+    }
+    if args.cmd is None:
         print(__doc__)
         show_db_status()
+    else:
+        commands[args.cmd]()
 
 
 if __name__ == "__main__":
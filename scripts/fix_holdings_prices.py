@@ -14,7 +14,8 @@ import sys
 sys.stdout.reconfigure(encoding='utf-8')
 sys.path.insert(0, '.')
 
-from datetime import date
+from datetime import date, timedelta
+import pymysql
 from db.connection import get_connection
 from services.portfolio_service import create_portfolio_snapshot, create_daily_portfolio_snapshot
 import yfinance as yf
@@ -22,32 +23,45 @@ import pandas as pd
 
 CUTOFF = date(2026, 2, 27)  # 2/27 is already correct
 START = date(2026, 2, 4)
+BATCH_SIZE = 1000
+
+# 보정값은 임시 테이블에 multi-row INSERT로 적재한 뒤 UPDATE JOIN 한 번으로 반영
+STAGE_INSERT_SQL = (
+    "INSERT INTO tmp_holdings_fix (snapshot_date, stk_cd, cur_prc, evlt_amt, pl_amt, pl_rt) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+UPDATE_SQL = (
+    "UPDATE holdings h JOIN tmp_holdings_fix t "
+    "ON h.snapshot_date = t.snapshot_date AND h.stk_cd = t.stk_cd "
+    "SET h.cur_prc = t.cur_prc, h.evlt_amt = t.evlt_amt, h.pl_amt = t.pl_amt, h.pl_rt = t.pl_rt"
+)
 
 conn = get_connection()
 cur = conn.cursor()
 
-# 1. Get all (snapshot_date, stk_cd) pairs to fix
+# 1. Get the tickers and dates to fix (작은 집계 쿼리; 행 자체는 아래에서 스트리밍)
 cur.execute(
-    "SELECT DISTINCT snapshot_date, stk_cd, rmnd_qty, avg_prc, pur_amt "
-    "FROM holdings WHERE snapshot_date >= %s AND snapshot_date < %s "
-    "ORDER BY snapshot_date, stk_cd",
+    "SELECT DISTINCT stk_cd FROM holdings WHERE snapshot_date >= %s AND snapshot_date < %s "
+    "ORDER BY stk_cd",
     (START, CUTOFF)
 )
-holdings_rows = cur.fetchall()
-
-# Collect unique tickers
-tickers = sorted(set(r[1] for r in holdings_rows))
-dates = sorted(set(r[0] for r in holdings_rows))
+tickers = [r[0] for r in cur.fetchall()]
+cur.execute(
+    "SELECT DISTINCT snapshot_date FROM holdings WHERE snapshot_date >= %s AND snapshot_date < %s "
+    "ORDER BY snapshot_date",
+    (START, CUTOFF)
+)
+dates = [r[0] for r in cur.fetchall()]
 
 print(f"=== Holdings 가격 보정 ===")
 print(f"기간: {dates[0]} ~ {dates[-1]}")
-print(f"종목: {len(tickers)}개 {tickers}")
-print(f"레코드: {len(holdings_rows)}건\n")
+print(f"종목: {len(tickers)}개 {tickers}\n")
 
 # 2. Fetch closing prices from yfinance (one batch call)
 print("[1/4] yfinance에서 종가 다운로드 중...")
-start_str = START.strftime("%Y-%m-%d")
-end_str = CUTOFF.strftime("%Y-%m-%d")  # yfinance end is exclusive, but we want up to 2/26
+# 실제 holdings가 있는 구간만 요청 (yfinance end is exclusive)
+start_str = dates[0].strftime("%Y-%m-%d")
+end_str = (dates[-1] + timedelta(days=1)).strftime("%Y-%m-%d")
 
 df = yf.download(tickers, start=start_str, end=end_str, auto_adjust=True, progress=False)
 
@@ -59,53 +73,94 @@ else:
     close_df = df['Close'].copy()
 
 close_df.index = close_df.index.date  # Convert to date
+close_df = close_df.loc[close_df.index.isin(set(dates))]  # holdings 없는 날짜 제거
 print(f"  다운로드 완료: {len(close_df)}일 x {len(close_df.columns)}종목\n")
 
+# (날짜, 종목) -> 종가 long 포맷 (청크마다 merge)
+prices_long = (
+    close_df.stack()
+    .rename_axis(["snapshot_date", "stk_cd"])
+    .rename("new_price")
+    .reset_index()
+)
+
+
+def _fix_rows(chunk):
+    """Merge one fetched chunk of holdings with the closes and return staging rows."""
+    holdings_df = pd.DataFrame(
+        chunk, columns=["snapshot_date", "stk_cd", "qty", "avg_prc", "pur_amt"]
+    )
+    holdings_df["qty"] = holdings_df["qty"].astype(int)
+    holdings_df["pur_amt"] = holdings_df["pur_amt"].astype(float)
+
+    # 종가 없는 행은 스킵
+    merged = holdings_df.merge(prices_long, on=["snapshot_date", "stk_cd"], how="inner")
+    merged = merged.dropna(subset=["new_price"])
+
+    merged["new_price"] = merged["new_price"].round(2)
+    merged["new_evlt"] = (merged["new_price"] * merged["qty"]).round(2)
+    merged["new_pl"] = (merged["new_evlt"] - merged["pur_amt"]).round(2)
+    merged["new_pl_rt"] = (
+        (merged["new_pl"] / merged["pur_amt"] * 100).where(merged["pur_amt"] > 0, 0).round(2)
+    )
+    return list(
+        merged[["snapshot_date", "stk_cd", "new_price", "new_evlt", "new_pl", "new_pl_rt"]]
+        .itertuples(index=False, name=None)
+    )
+
+
 # 3. Update holdings
 print("[2/4] holdings 가격 업데이트 중...")
+cur.execute("DROP TEMPORARY TABLE IF EXISTS tmp_holdings_fix")
+cur.execute(
+    "CREATE TEMPORARY TABLE tmp_holdings_fix ("
+    "snapshot_date DATE, stk_cd VARCHAR(20), cur_prc DECIMAL(15, 4), evlt_amt DECIMAL(20, 4), "
+    "pl_amt DECIMAL(20, 4), pl_rt DECIMAL(10, 4), INDEX idx_date_stk (snapshot_date, stk_cd))"
+)
+
+# 서버 측 커서(SSCursor)로 BATCH_SIZE 행씩 읽어 청크마다 merge -> 임시 테이블에 적재.
+# 결과를 다 읽기 전에는 같은 커넥션에 다른 쿼리를 보낼 수 없으므로 조회 전용 커넥션 사용
+fetched = 0
 updated = 0
-skipped = 0
-
-for snapshot_dt, stk_cd, qty, avg_prc, pur_amt in holdings_rows:
-    if snapshot_dt not in close_df.index:
-        skipped += 1
-        continue
-
-    if stk_cd not in close_df.columns:
-        skipped += 1
-        continue
-
-    new_price = close_df.loc[snapshot_dt, stk_cd]
-    if pd.isna(new_price):
-        skipped += 1
-        continue
-
-    new_price = round(float(new_price), 2)
-    new_evlt = round(new_price * int(qty), 2)
-    new_pl = round(new_evlt - float(pur_amt), 2)
-    new_pl_rt = round((new_pl / float(pur_amt)) * 100, 2) if float(pur_amt) > 0 else 0
-
-    cur.execute(
-        "UPDATE holdings SET cur_prc = %s, evlt_amt = %s, pl_amt = %s, pl_rt = %s "
-        "WHERE snapshot_date = %s AND stk_cd = %s",
-        (new_price, new_evlt, new_pl, new_pl_rt, snapshot_dt, stk_cd)
-    )
-    updated += 1
+read_conn = get_connection(autocommit=True)
+try:
+    with read_conn.cursor(pymysql.cursors.SSCursor) as read_cur:
+        read_cur.execute(
+            "SELECT DISTINCT snapshot_date, stk_cd, rmnd_qty, avg_prc, pur_amt "
+            "FROM holdings WHERE snapshot_date >= %s AND snapshot_date < %s "
+            "ORDER BY snapshot_date, stk_cd",
+            (START, CUTOFF)
+        )
+        while True:
+            chunk = read_cur.fetchmany(BATCH_SIZE)
+            if not chunk:
+                break
+            fetched += len(chunk)
+            rows = _fix_rows(chunk)
+            if rows:
+                cur.executemany(STAGE_INSERT_SQL, rows)
+            updated += len(rows)
+finally:
+    read_conn.close()
+
+cur.execute(UPDATE_SQL)
+cur.execute("DROP TEMPORARY TABLE tmp_holdings_fix")  # 풀에 반납될 세션에 남기지 않음
+
+skipped = fetched - updated
 
 conn.commit()
+print(f"  레코드: {fetched}건")
 print(f"  업데이트: {updated}건, 스킵: {skipped}건\n")
 
 # 4. Regenerate portfolio_snapshot for each date
 print("[3/4] portfolio_snapshot 재생성 중...")
-for dt in dates:
-    count = create_portfolio_snapshot(conn, dt)
-    print(f"  {dt}: {count} positions")
+positions = sum(create_portfolio_snapshot(conn, dt) for dt in dates)
+print(f"  {len(dates)}일, {positions} positions")
 
 # 5. Regenerate daily_portfolio_snapshot for each date
 print("\n[4/4] daily_portfolio_snapshot 재생성 중...")
-for dt in dates:
-    ok = create_daily_portfolio_snapshot(conn, dt)
-    print(f"  {dt}: {'created' if ok else 'skipped'}")
+created = sum(1 for dt in dates if create_daily_portfolio_snapshot(conn, dt))
+print(f"  created: {created}건, skipped: {len(dates) - created}건")
 
 conn.close()
 print("\n=== 완료 ===")
@@ -10,12 +10,14 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 import pymysql
-from config.settings import Settings
+from pymysql.constants import CLIENT
+from config.settings import get_settings
+from db.schema_loader import SCHEMA_DIR, load_schema_statements
 
 
 def init_database():
     """Initialize the asset_us database and tables."""
-    settings = Settings()
+    settings = get_settings()
 
     # Try to connect to existing database first
     try:
@@ -25,6 +27,7 @@ def init_database():
             password=settings.DB_PASSWORD,
             database=settings.DB_NAME,
             charset="utf8mb4",
+            client_flag=CLIENT.MULTI_STATEMENTS,
         )
         print(f"Connected to existing database '{settings.DB_NAME}'.")
     except pymysql.err.OperationalError as e:
@@ -42,39 +45,28 @@ def init_database():
             cur.execute(f"USE {settings.DB_NAME}")
 
             # Read and execute all schema files
-            schema_dir = Path(__file__).resolve().parent.parent / "db"
             schema_files = [
                 "schema.sql",
                 "schema_market_index.sql",
                 "schema_daily_snapshot.sql",
+                "schema_sync_state.sql",
             ]
 
+            statements = []
             for schema_file in schema_files:
-                schema_path = schema_dir / schema_file
-                if not schema_path.exists():
+                if not (SCHEMA_DIR / schema_file).exists():
                     print(f"  Skipping {schema_file} (not found)")
                     continue
 
-                print(f"  Executing {schema_file}...")
-                with open(schema_path, "r", encoding="utf-8") as f:
-                    schema_sql = f.read()
-
-                # Split by semicolon and execute each statement
-                statements = [s.strip() for s in schema_sql.split(";") if s.strip()]
-
-                for statement in statements:
-                    # Skip USE and CREATE DATABASE statements (already handled)
-                    if statement.upper().startswith("CREATE DATABASE"):
-                        continue
-                    if statement.upper().startswith("USE "):
-                        continue
-
-                    try:
-                        cur.execute(statement)
-                    except pymysql.err.OperationalError as e:
-                        # Ignore "table already exists" errors
-                        if e.args[0] != 1050:
-                            raise
+                print(f"  Reading {schema_file}...")
+                statements.extend(load_schema_statements(schema_file))
+
+            # 모든 DDL을 한 번에 전송 (MULTI_STATEMENTS), 결과셋은 nextset()으로 소진
+            # 모두 IF NOT EXISTS이므로 오류가 나면 그대로 중단 (남은 DDL을 조용히 건너뛰지 않음)
+            print(f"  Executing {len(statements)} statements...")
+            cur.execute(";\n".join(statements))
+            while cur.nextset():
+                pass
 
             conn.commit()
             print("All tables created successfully.")
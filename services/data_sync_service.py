@@ -3,14 +3,20 @@ Data synchronization service for overseas stocks.
 Syncs data from Korea Investment & Securities API to asset_us database.
 """
 
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Union
 from zoneinfo import ZoneInfo
 
 import pymysql
 
 from db.connection import get_connection
-from services.kis_service import KISAPIClient
+from services.kis_service import KISAPIClient, KISCacheMissError
+
+logger = logging.getLogger(__name__)
 
 # US Eastern timezone
 ET = ZoneInfo("America/New_York")
@@ -28,6 +34,14 @@ def get_trading_date_et() -> date:
     return now_et.date()
 
 
+def _to_date(value: Union[str, date]) -> date:
+    """Accept a date or a KIS-style 'YYYYMMDD' string and return a date."""
+    if isinstance(value, date):
+        return value
+    # 고정 포맷이므로 strptime 대신 슬라이싱
+    return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+
+
 # 거래소별 통화 매핑
 EXCHANGE_CURRENCY_MAP = {
     "NASD": "USD",
@@ -42,6 +56,9 @@ EXCHANGE_CURRENCY_MAP = {
     "VNSE": "VND",
 }
 
+# 잔고 조회 대상 US 거래소 (거래소코드, 통화)
+US_EXCHANGES = (("NASD", "USD"), ("NYSE", "USD"), ("AMEX", "USD"))
+
 # 대출유형코드 -> 신용구분 매핑
 LOAN_TYPE_TO_CRD_CLASS = {
     "00": "CASH",
@@ -51,58 +68,114 @@ LOAN_TYPE_TO_CRD_CLASS = {
 }
 
 
-def _get_crd_class(loan_type_cd: str) -> str:
-    """대출유형코드를 신용구분으로 변환"""
-    return LOAN_TYPE_TO_CRD_CLASS.get(loan_type_cd, "CREDIT")
+# multi-row INSERT 한 문장당 최대 행 수 (max_allowed_packet 여유 확보)
+INSERT_CHUNK_SIZE = 1000
+
+# 체결내역 동기화 시 동시에 미리 조회해 둘 날짜 수 (INSERT는 날짜 순서대로)
+TRADE_FETCH_WORKERS = 4
+
+# 체결내역 동기화 시 커밋 간격 (일). 하루마다 커밋하면 긴 재구성에서 fsync가 누적됨
+TRADE_COMMIT_INTERVAL_DAYS = 30
+
+
+def _executemany_chunked(cur, sql: str, rows: List[tuple], chunk_size: int = INSERT_CHUNK_SIZE) -> int:
+    """Run executemany in chunks and return the total affected row count."""
+    affected = 0
+    for i in range(0, len(rows), chunk_size):
+        cur.executemany(sql, rows[i:i + chunk_size])
+        affected += cur.rowcount
+    return affected
+
+
+def _truncate_table(conn: pymysql.connections.Connection, table: str) -> int:
+    """
+    Empty a table with TRUNCATE and return how many rows it held.
+
+    TRUNCATE drops and recreates the table instead of logging every row, and
+    resets AUTO_INCREMENT. It commits implicitly, so call it between transactions.
+    """
+    with conn.cursor() as cur:
+        # TRUNCATE의 rowcount는 항상 0이므로 삭제 건수는 미리 집계
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        count = cur.fetchone()[0]
+        cur.execute(f"TRUNCATE TABLE {table}")
+    return count
+
+
+@lru_cache(maxsize=1)
+def _get_client() -> KISAPIClient:
+    """
+    Return the process-wide KIS client used when the caller does not pass one.
+
+    Sharing it keeps one OAuth token and one pooled HTTPS session across sync steps.
+    """
+    return KISAPIClient()
 
 
 def sync_holdings_from_kis(
     conn: pymysql.connections.Connection,
     client: Optional[KISAPIClient] = None,
     snapshot_date: Optional[date] = None,
+    commit: bool = True,
 ) -> int:
     """
     KIS API에서 해외주식 잔고를 조회하여 holdings 테이블에 동기화.
 
+    해당 snapshot_date에서 더 이상 보유하지 않는 종목 행을 지우고 나머지는 UPSERT.
+    DELETE는 holdings.idx_snapshot_date 인덱스(db/schema.sql)를 타므로 그날 행 수에만 비례.
+
     Args:
         conn: Database connection
         client: KIS API client (optional, creates new one if not provided)
         snapshot_date: Snapshot date (default: US ET trading date)
+        commit: Commit when done (False leaves the transaction to the caller)
 
     Returns:
         Number of holdings synced
     """
     if client is None:
-        client = KISAPIClient()
+        client = _get_client()
 
     if snapshot_date is None:
         # Use US ET date for consistency with trading schedule
         snapshot_date = get_trading_date_et()
 
     # US 거래소에서만 잔고 조회 (NASD, NYSE, AMEX)
-    US_EXCHANGES = [("NASD", "USD"), ("NYSE", "USD"), ("AMEX", "USD")]
+    # 거래소별 조회를 동시에 실행 (호출 간격은 클라이언트 rate limiter가 보장).
+    # 토큰은 미리 발급해 두어 스레드들이 동시에 토큰을 요청하지 않게 함
+    client.get_access_token()
+    with ThreadPoolExecutor(max_workers=len(US_EXCHANGES)) as executor:
+        futures = [
+            (executor.submit(client.get_holdings, exchange_code=exchange_code, currency=currency),
+             exchange_code, currency)
+            for exchange_code, currency in US_EXCHANGES
+        ]
+
     all_holdings = []
-    for exchange_code, currency in US_EXCHANGES:
+    fetch_failed = False
+    for future, exchange_code, currency in futures:
         try:
-            holdings = client.get_holdings(exchange_code=exchange_code, currency=currency)
+            holdings = future.result()
             for h in holdings:
                 h["_exchange_code"] = exchange_code
                 h["_currency"] = currency
             all_holdings.extend(holdings)
+        except KISCacheMissError:
+            raise  # 재실행 모드에서 응답이 없으면 빈 잔고로 취급하지 않음
         except Exception as e:
             # 일부 거래소에서 잔고가 없을 수 있음
             if "no data" not in str(e).lower():
-                print(f"  Warning: {exchange_code} holdings fetch failed: {e}")
+                logger.warning("  Warning: %s holdings fetch failed: %s", exchange_code, e)
+                fetch_failed = True
             # no data는 정상 (해당 거래소에 잔고 없음)
 
     if not all_holdings:
-        print("  No holdings found")
-        return 0
-
-    # 기존 데이터 삭제 (먼저 commit)
-    with conn.cursor() as cur:
-        cur.execute("DELETE FROM holdings WHERE snapshot_date = %s", (snapshot_date,))
-    conn.commit()
+        if fetch_failed:
+            # 조회 실패와 실제 무보유를 구분: 실패면 기존 행을 건드리지 않음
+            logger.warning("  Holdings fetch failed; keeping existing rows")
+            return 0
+        # 전량 매도 등으로 잔고가 비었으면 아래에서 그날 행을 모두 정리
+        logger.info("  No holdings found")
 
     # 새 데이터 삽입 (ON DUPLICATE KEY UPDATE 사용)
     insert_sql = """
@@ -125,91 +198,148 @@ def sync_holdings_from_kis(
             pur_amt = VALUES(pur_amt)
     """
 
-    count = 0
-    with conn.cursor() as cur:
-        for h in all_holdings:
-            # 잔고수량이 0이면 스킵
-            qty = int(h.get("ovrs_cblc_qty", 0) or 0)
-            if qty == 0:
-                continue
-
-            loan_type_cd = h.get("loan_type_cd", "")
-            crd_class = _get_crd_class(loan_type_cd)
+    crd_class_of = LOAN_TYPE_TO_CRD_CLASS.get  # 대출유형코드 -> 신용구분
+
+    # 잔고수량이 0인 종목은 행을 만들기 전에 제외
+    held = [(h, qty) for h in all_holdings if (qty := int(h.get("ovrs_cblc_qty") or 0))]
+
+    rows = [
+        (
+            snapshot_date,
+            h.get("ovrs_pdno", ""),  # 종목코드
+            h.get("ovrs_item_name", ""),  # 종목명
+            qty,  # 잔고수량
+            float(h.get("pchs_avg_pric") or 0),  # 평균단가
+            float(h.get("now_pric2") or 0),  # 현재가
+            "",  # loan_dt (해외주식은 보통 비어있음)
+            crd_class_of(h.get("loan_type_cd", ""), "CREDIT"),
+            h.get("_currency", "USD"),
+            h.get("_exchange_code", "NASD"),
+            float(h.get("ovrs_stck_evlu_amt") or 0),  # 평가금액
+            float(h.get("frcr_evlu_pfls_amt") or 0),  # 평가손익
+            float(h.get("evlu_pfls_rt") or 0),  # 평가손익률
+            float(h.get("frcr_pchs_amt1") or 0),  # 매입금액
+        )
+        for h, qty in held
+    ]
 
+    # 더 이상 보유하지 않는 종목만 삭제하고 나머지는 UPSERT (한 트랜잭션)
+    # 계속 보유 중인 행은 지웠다 다시 넣지 않고 제자리에서 갱신됨
+    # 일부 거래소 조회가 실패했으면 그 종목을 매도로 오인해 지우지 않도록 삭제 생략
+    stk_cds = sorted({row[1] for row in rows})
+    with conn.cursor() as cur:
+        if not fetch_failed and stk_cds:
+            placeholders = ", ".join(["%s"] * len(stk_cds))
             cur.execute(
-                insert_sql,
-                (
-                    snapshot_date,
-                    h.get("ovrs_pdno", ""),  # 종목코드
-                    h.get("ovrs_item_name", ""),  # 종목명
-                    qty,  # 잔고수량
-                    float(h.get("pchs_avg_pric", 0) or 0),  # 평균단가
-                    float(h.get("now_pric2", 0) or 0),  # 현재가
-                    "",  # loan_dt (해외주식은 보통 비어있음)
-                    crd_class,
-                    h.get("_currency", "USD"),
-                    h.get("_exchange_code", "NASD"),
-                    float(h.get("ovrs_stck_evlu_amt", 0) or 0),  # 평가금액
-                    float(h.get("frcr_evlu_pfls_amt", 0) or 0),  # 평가손익
-                    float(h.get("evlu_pfls_rt", 0) or 0),  # 평가손익률
-                    float(h.get("frcr_pchs_amt1", 0) or 0),  # 매입금액
-                ),
+                f"DELETE FROM holdings WHERE snapshot_date = %s AND stk_cd NOT IN ({placeholders})",
+                (snapshot_date, *stk_cds),
             )
-            count += 1
+        elif not fetch_failed:
+            cur.execute("DELETE FROM holdings WHERE snapshot_date = %s", (snapshot_date,))
+        # executemany -> PyMySQL이 INSERT_CHUNK_SIZE 행씩 multi-row INSERT로 재작성
+        _executemany_chunked(cur, insert_sql, rows)
+    count = len(rows)
 
-    conn.commit()
+    if commit:
+        conn.commit()
     return count
 
 
-def _sync_single_day_trades(
-    conn: pymysql.connections.Connection,
-    client: KISAPIClient,
-    query_date: str,
-) -> int:
+def _fetch_single_day_trades(client: KISAPIClient, query_date: str) -> List[tuple]:
     """
-    KIS API에서 단일 날짜의 체결내역을 조회하여 DB에 저장.
+    KIS API에서 단일 날짜의 체결내역을 조회하여 INSERT용 행으로 변환.
+
+    DB를 건드리지 않으므로 다른 날짜의 INSERT와 겹쳐서 실행할 수 있음.
 
     Args:
-        conn: Database connection
         client: KIS API client
         query_date: Date to query (YYYYMMDD)
 
     Returns:
-        Number of trades synced for this day
+        Rows for _insert_trades (zero-quantity fills removed)
     """
+    # 매도(01) -> 매수(02) 순서로 조회 (날짜 단위 병렬화는 호출자가 담당)
     all_trades = []
+    for sll_buy_dvsn, label in (("01", "sell"), ("02", "buy")):
+        try:
+            trades = client.get_trade_history(
+                start_date=query_date,
+                end_date=query_date,
+                exchange_code="%",
+                sll_buy_dvsn=sll_buy_dvsn,
+            )
+            for t in trades:
+                exchange_code = t.get("ovrs_excg_cd", "NASD")
+                t["_exchange_code"] = exchange_code
+                t["_currency"] = EXCHANGE_CURRENCY_MAP.get(exchange_code, "USD")
+            all_trades.extend(trades)
+        except KISCacheMissError:
+            raise  # 재실행 모드에서 응답이 없으면 체결 없음으로 취급하지 않음
+        except Exception as e:
+            if "no data" not in str(e).lower():
+                logger.warning("    Warning: %s history fetch failed for %s: %s", label, query_date, e)
+
+    rows = []
+    for t in all_trades:
+        g = t.get  # 행마다 dict 메서드 조회를 한 번만
+        # 매매구분 변환 (01: 매도, 02: 매수)
+        sll_buy = g("sll_buy_dvsn_cd", "")
+        if sll_buy == "01":
+            io_tp_nm = "매도"
+        elif sll_buy == "02":
+            io_tp_nm = "매수"
+        else:
+            io_tp_nm = g("sll_buy_dvsn_cd_name", "")
+
+        # 체결수량이 0이면 스킵
+        qty = int(g("ft_ccld_qty") or g("ccld_qty") or 0)
+        if qty == 0:
+            continue
+
+        # 주문번호 생성 (ord_dt + ord_gno_brno + odno)
+        # (키가 있어도 값이 null일 수 있으므로 `or ""`로 정규화)
+        ord_dt = g("ord_dt") or ""
+        ord_no = "-".join((ord_dt, g("ord_gno_brno") or "", g("odno") or ""))
+
+        # 거래일자: MySQL DATE 컬럼은 'YYYYMMDD' 문자열을 그대로 받음
+        trade_date_str = ord_dt if ord_dt and len(ord_dt) == 8 else None
+
+        rows.append((
+            ord_no,
+            g("pdno", ""),  # 종목코드
+            g("prdt_name", ""),  # 종목명
+            io_tp_nm,
+            "CASH",  # 해외주식은 대부분 현금거래
+            trade_date_str,
+            g("ord_tmd", ""),  # 주문시간
+            qty,
+            float(g("ft_ccld_unpr3") or g("ccld_pric") or 0),  # 체결단가
+            "",  # loan_dt
+            g("_currency", "USD"),
+            g("_exchange_code", "NASD"),
+        ))
+
+    return rows
+
+
+def _insert_trades(
+    conn: pymysql.connections.Connection,
+    rows: List[tuple],
+    commit: bool = True,
+) -> int:
+    """
+    _fetch_single_day_trades가 만든 행을 account_trade_history에 저장.
 
-    # 1. 매도 조회 (01)
-    try:
-        sells = client.get_trade_history(
-            start_date=query_date,
-            end_date=query_date,
-            exchange_code="%",
-            sll_buy_dvsn="01",  # 매도만
-        )
-        for t in sells:
-            t["_exchange_code"] = t.get("ovrs_excg_cd", "NASD")
-        all_trades.extend(sells)
-    except Exception as e:
-        if "no data" not in str(e).lower():
-            print(f"    Warning: sell history fetch failed for {query_date}: {e}")
-
-    # 2. 매수 조회 (02)
-    try:
-        buys = client.get_trade_history(
-            start_date=query_date,
-            end_date=query_date,
-            exchange_code="%",
-            sll_buy_dvsn="02",  # 매수만
-        )
-        for t in buys:
-            t["_exchange_code"] = t.get("ovrs_excg_cd", "NASD")
-        all_trades.extend(buys)
-    except Exception as e:
-        if "no data" not in str(e).lower():
-            print(f"    Warning: buy history fetch failed for {query_date}: {e}")
+    Args:
+        conn: Database connection
+        rows: Rows from _fetch_single_day_trades
+        commit: Commit when done (False leaves the transaction to the caller)
 
-    if not all_trades:
+    Returns:
+        Number of trades inserted (duplicates ignored)
+    """
+    # 수량 필터로 모두 걸러졌으면 쓸 것이 없음
+    if not rows:
         return 0
 
     # INSERT IGNORE로 중복 방지
@@ -221,64 +351,21 @@ def _sync_single_day_trades(
         ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
     """
 
-    count = 0
+    # INSERT IGNORE multi-row: rowcount = 실제 삽입된(중복 아닌) 행 수
     with conn.cursor() as cur:
-        for t in all_trades:
-            # 매매구분 변환 (01: 매도, 02: 매수)
-            sll_buy = t.get("sll_buy_dvsn_cd", "")
-            if sll_buy == "01":
-                io_tp_nm = "매도"
-            elif sll_buy == "02":
-                io_tp_nm = "매수"
-            else:
-                io_tp_nm = t.get("sll_buy_dvsn_cd_name", "")
-
-            # 체결수량이 0이면 스킵
-            qty = int(t.get("ft_ccld_qty", 0) or t.get("ccld_qty", 0) or 0)
-            if qty == 0:
-                continue
-
-            # 주문번호 생성 (ord_dt + ord_gno_brno + odno)
-            ord_no = f"{t.get('ord_dt', '')}-{t.get('ord_gno_brno', '')}-{t.get('odno', '')}"
-
-            # 거래일자 파싱
-            ord_dt = t.get("ord_dt", "")
-            if ord_dt and len(ord_dt) == 8:
-                trade_date_str = f"{ord_dt[:4]}-{ord_dt[4:6]}-{ord_dt[6:8]}"
-            else:
-                trade_date_str = None
-
-            exchange_code = t.get("_exchange_code", "NASD")
-            currency = EXCHANGE_CURRENCY_MAP.get(exchange_code, "USD")
+        count = _executemany_chunked(cur, insert_sql, rows)
 
-            cur.execute(
-                insert_sql,
-                (
-                    ord_no,
-                    t.get("pdno", ""),  # 종목코드
-                    t.get("prdt_name", ""),  # 종목명
-                    io_tp_nm,
-                    "CASH",  # 해외주식은 대부분 현금거래
-                    trade_date_str,
-                    t.get("ord_tmd", ""),  # 주문시간
-                    qty,
-                    float(t.get("ft_ccld_unpr3", 0) or t.get("ccld_pric", 0) or 0),  # 체결단가
-                    "",  # loan_dt
-                    currency,
-                    exchange_code,
-                ),
-            )
-            count += cur.rowcount
-
-    conn.commit()
+    if commit:
+        conn.commit()
     return count
 
 
 def sync_trade_history_from_kis(
     conn: pymysql.connections.Connection,
     client: Optional[KISAPIClient] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
+    start_date: Optional[Union[str, date]] = None,
+    end_date: Optional[Union[str, date]] = None,
+    commit: bool = True,
 ) -> int:
     """
     KIS API에서 해외주식 체결내역을 조회하여 account_trade_history 테이블에 동기화.
@@ -287,46 +374,71 @@ def sync_trade_history_from_kis(
     - 긴 기간을 한번에 조회하면 100페이지 제한에 걸려 일부 데이터만 가져옴
     - 하루씩 조회하면 페이지네이션 문제 없이 모든 데이터를 가져올 수 있음
 
+    최대 TRADE_FETCH_WORKERS개 날짜를 백그라운드 스레드에서 미리 조회하여, 현재
+    날짜의 INSERT와 API 대기 시간이 겹치도록 함. 호출 빈도는 클라이언트 rate
+    limiter가 제한하고, DB 작업은 호출 스레드의 conn에서 날짜 순서대로만 수행.
+
     Args:
         conn: Database connection
         client: KIS API client
-        start_date: Start date (YYYYMMDD)
-        end_date: End date (YYYYMMDD)
+        start_date: Start date (date or YYYYMMDD string, default: 1 year ago)
+        end_date: End date (date or YYYYMMDD string, default: today ET)
+        commit: Commit every TRADE_COMMIT_INTERVAL_DAYS days and at the end
+                (False leaves the transaction to the caller)
 
     Returns:
         Number of trades synced
     """
     if client is None:
-        client = KISAPIClient()
-
-    if end_date is None:
-        # Use US ET date (KIS API returns trade dates in US local time)
-        today_et = datetime.now(ET).date()
-        end_date = today_et.strftime("%Y%m%d")
+        client = _get_client()
 
-    if start_date is None:
-        # 기본: 1년 전부터
-        today_et = datetime.now(ET).date()
-        start_date = (today_et.replace(year=today_et.year - 1)).strftime("%Y%m%d")
+    # Use US ET date (KIS API returns trade dates in US local time)
+    today_et = datetime.now(ET).date()
 
-    # Parse dates
-    start_dt = date(int(start_date[:4]), int(start_date[4:6]), int(start_date[6:8]))
-    end_dt = date(int(end_date[:4]), int(end_date[4:6]), int(end_date[6:8]))
+    end_dt = _to_date(end_date) if end_date is not None else today_et
+    # 기본: 1년 전부터
+    start_dt = _to_date(start_date) if start_date is not None else today_et.replace(year=today_et.year - 1)
 
     total_count = 0
-    current_dt = start_dt
+    if start_dt > end_dt:
+        return total_count
+
+    # 토큰은 미리 발급해 두어 조회 스레드들이 동시에 토큰을 요청하지 않게 함
+    client.get_access_token()
+
+    query_dates = (start_dt + timedelta(days=i) for i in range((end_dt - start_dt).days + 1))
+
+    # Iterate day by day (producer: 다음 날짜들 조회, consumer: 현재 날짜 INSERT)
+    days_done = 0
+    with ThreadPoolExecutor(max_workers=TRADE_FETCH_WORKERS) as pool:
+        pending = deque()
 
-    # Iterate day by day
-    while current_dt <= end_dt:
-        query_date = current_dt.strftime("%Y%m%d")
-        day_count = _sync_single_day_trades(conn, client, query_date)
+        def submit_next() -> None:
+            query_dt = next(query_dates, None)
+            if query_dt is not None:
+                future = pool.submit(_fetch_single_day_trades, client, query_dt.strftime("%Y%m%d"))
+                pending.append((query_dt, future))
 
-        if day_count > 0:
-            print(f"    {current_dt}: {day_count} trades")
-        total_count += day_count
+        for _ in range(TRADE_FETCH_WORKERS):
+            submit_next()
 
-        current_dt += timedelta(days=1)
+        while pending:
+            current_dt, future = pending.popleft()
+            rows = future.result()
+            submit_next()
 
+            day_count = _insert_trades(conn, rows, commit=False)
+
+            if day_count > 0:
+                logger.info("    %s: %s trades", current_dt, day_count)
+            total_count += day_count
+
+            days_done += 1
+            if commit and days_done % TRADE_COMMIT_INTERVAL_DAYS == 0:
+                conn.commit()
+
+    if commit:
+        conn.commit()
     return total_count
 
 
@@ -342,26 +454,23 @@ def rebuild_trade_history(start_date: str = "20260201") -> int:
         Number of trades synced
     """
     conn = get_connection()
-    client = KISAPIClient()
+    client = _get_client()
 
     try:
         # 1. 기존 데이터 삭제
-        print("[1] Clearing existing trade history...")
-        with conn.cursor() as cur:
-            cur.execute("DELETE FROM account_trade_history")
-            deleted = cur.rowcount
-        conn.commit()
-        print(f"    Deleted {deleted} existing records")
+        logger.info("[1] Clearing existing trade history...")
+        deleted = _truncate_table(conn, "account_trade_history")
+        logger.info("    Deleted %s existing records", deleted)
 
         # 2. 하루씩 동기화
-        print(f"\n[2] Syncing trade history from {start_date}...")
+        logger.info("\n[2] Syncing trade history from %s...", start_date)
         count = sync_trade_history_from_kis(conn, client, start_date)
-        print(f"\n[OK] Total {count} trades synced")
+        logger.info("\n[OK] Total %s trades synced", count)
 
         return count
 
     except Exception as e:
-        print(f"[ERROR] Rebuild failed: {e}")
+        logger.error("[ERROR] Rebuild failed: %s", e)
         raise
     finally:
         conn.close()
@@ -371,24 +480,25 @@ def sync_account_summary_from_kis(
     conn: pymysql.connections.Connection,
     client: Optional[KISAPIClient] = None,
     snapshot_date: Optional[date] = None,
+    commit: bool = True,
 ) -> int:
     """
     KIS API에서 계좌 요약 정보를 동기화.
 
     총자산(tot_est_amt) = 현금(cash_balance) + 주식평가액(aset_evlt_amt)
+    (holdings 집계는 idx_snapshot_date 인덱스로 해당 날짜 행만 읽음)
 
     Args:
         conn: Database connection
         client: KIS API client
         snapshot_date: Snapshot date (default: US ET trading date)
+        commit: Commit when done (False leaves the transaction to the caller)
 
     Returns:
         1 if synced, 0 otherwise
     """
-    import requests
-
     if client is None:
-        client = KISAPIClient()
+        client = _get_client()
 
     if snapshot_date is None:
         # Use US ET date for consistency with trading schedule
@@ -407,50 +517,39 @@ def sync_account_summary_from_kis(
             "ITEM_CD": "AAPL",
         }
         client._wait_for_rate_limit()
-        response = requests.get(url, headers=headers, params=params)
+        response = client._session.get(url, headers=headers, params=params)
         data = response.json()
         if data.get("rt_cd") == "0":
             output = data.get("output", {})
             cash_balance = float(output.get("ord_psbl_frcr_amt", 0) or 0)
             # 매도대금 재사용가능액 포함 (미결제 매도대금)
             cash_balance += float(output.get("sll_ruse_psbl_amt", 0) or 0)
+    except KISCacheMissError:
+        raise  # 재실행 모드에서 응답이 없으면 현금 0으로 기록하지 않음
     except Exception as e:
-        print(f"    Warning: Failed to get cash balance: {e}")
+        logger.warning("    Warning: Failed to get cash balance: %s", e)
 
-    # 2. holdings에서 주식평가액/투자원금 집계
+    # 2. holdings에서 주식평가액/투자원금을 집계해 REPLACE로 upsert (한 문장, 서버에서 계산)
+    #    총자산 = 현금 + 주식평가액
     with conn.cursor() as cur:
         cur.execute(
             """
+            REPLACE INTO account_summary
+            (snapshot_date, aset_evlt_amt, cash_balance, tot_est_amt, invt_bsamt)
             SELECT
-                COALESCE(SUM(evlt_amt), 0) as total_evlt,
-                COALESCE(SUM(pur_amt), 0) as total_pur
+                %s,
+                COALESCE(SUM(evlt_amt), 0),
+                %s,
+                %s + COALESCE(SUM(evlt_amt), 0),
+                COALESCE(SUM(pur_amt), 0)
             FROM holdings
             WHERE snapshot_date = %s
             """,
-            (snapshot_date,),
-        )
-        row = cur.fetchone()
-
-    if row is None:
-        total_evlt, total_pur = 0, 0
-    else:
-        total_evlt, total_pur = row
-
-    # 총자산 = 현금 + 주식평가액
-    total_assets = cash_balance + float(total_evlt)
-
-    # REPLACE로 upsert
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            REPLACE INTO account_summary
-            (snapshot_date, aset_evlt_amt, cash_balance, tot_est_amt, invt_bsamt)
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            (snapshot_date, total_evlt, cash_balance, total_assets, total_pur),
+            (snapshot_date, cash_balance, cash_balance, snapshot_date),
         )
 
-    conn.commit()
+    if commit:
+        conn.commit()
     return 1
 
 
@@ -466,30 +565,30 @@ def sync_all(
         snapshot_date: Snapshot date for holdings/summary
     """
     conn = get_connection()
-    client = KISAPIClient()
+    client = _get_client()
 
     try:
-        print("Starting KIS API synchronization...")
+        logger.info("Starting KIS API synchronization...")
 
         # 1. Trade history sync
-        print("\n[1] Syncing trade history...")
+        logger.info("\n[1] Syncing trade history...")
         trades_count = sync_trade_history_from_kis(conn, client, start_date)
-        print(f"  -> {trades_count} trades synced")
+        logger.info("  -> %s trades synced", trades_count)
 
         # 2. Holdings sync
-        print("\n[2] Syncing holdings...")
+        logger.info("\n[2] Syncing holdings...")
         holdings_count = sync_holdings_from_kis(conn, client, snapshot_date)
-        print(f"  -> {holdings_count} holdings synced")
+        logger.info("  -> %s holdings synced", holdings_count)
 
         # 3. Account summary sync
-        print("\n[3] Syncing account summary...")
+        logger.info("\n[3] Syncing account summary...")
         summary_count = sync_account_summary_from_kis(conn, client, snapshot_date)
-        print(f"  -> {summary_count} summary synced")
+        logger.info("  -> %s summary synced", summary_count)
 
-        print(f"\nTotal synced: {trades_count + holdings_count + summary_count} records")
+        logger.info("\nTotal synced: %s records", trades_count + holdings_count + summary_count)
 
     except Exception as e:
-        print(f"Synchronization failed: {e}")
+        logger.error("Synchronization failed: %s", e)
         raise
     finally:
         conn.close()
@@ -512,85 +611,79 @@ def rebuild_all_data(trade_start_date: str = "20260201", clear_derived: bool = T
         dict: 각 단계별 처리 결과
     """
     conn = get_connection()
-    client = KISAPIClient()
+    client = _get_client()
     results = {}
 
     try:
-        print("=" * 60)
-        print("  DB 전체 재구성 시작")
-        print("=" * 60)
+        logger.info("=" * 60)
+        logger.info("  DB 전체 재구성 시작")
+        logger.info("=" * 60)
 
         # ============================================================
         # 1단계: 거래내역 재구성
         # ============================================================
-        print("\n[1/4] 거래내역(account_trade_history) 재구성...")
-        with conn.cursor() as cur:
-            cur.execute("DELETE FROM account_trade_history")
-            deleted = cur.rowcount
-        conn.commit()
-        print(f"      기존 데이터 삭제: {deleted}건")
+        logger.info("\n[1/4] 거래내역(account_trade_history) 재구성...")
+        deleted = _truncate_table(conn, "account_trade_history")
+        logger.info("      기존 데이터 삭제: %s건", deleted)
 
         trades_count = sync_trade_history_from_kis(conn, client, trade_start_date)
         results["trade_history"] = trades_count
-        print(f"      새로 동기화: {trades_count}건")
+        logger.info("      새로 동기화: %s건", trades_count)
 
         # ============================================================
         # 2단계: 파생 테이블 초기화
         # ============================================================
         if clear_derived:
-            print("\n[2/4] 파생 테이블 초기화...")
+            logger.info("\n[2/4] 파생 테이블 초기화...")
             derived_tables = ["daily_lots", "portfolio_snapshot", "daily_portfolio_snapshot"]
             for table in derived_tables:
-                with conn.cursor() as cur:
-                    cur.execute(f"DELETE FROM {table}")
-                    deleted = cur.rowcount
-                conn.commit()
-                print(f"      {table}: {deleted}건 삭제")
+                deleted = _truncate_table(conn, table)
+                logger.info("      %s: %s건 삭제", table, deleted)
                 results[f"cleared_{table}"] = deleted
         else:
-            print("\n[2/4] 파생 테이블 초기화 건너뜀")
+            logger.info("\n[2/4] 파생 테이블 초기화 건너뜀")
 
         # ============================================================
         # 3단계: 보유종목 동기화
         # ============================================================
-        print("\n[3/4] 보유종목(holdings) 동기화...")
-        # 기존 holdings 삭제 (오늘 날짜만)
+        logger.info("\n[3/4] 보유종목(holdings) 동기화...")
+        # 재구성이므로 오늘 날짜 holdings를 처음부터 다시 만듦
+        # (커밋하지 않고 sync_holdings_from_kis의 커밋에 포함 -> 비어 있는 중간 상태 없음)
         today = date.today()
         with conn.cursor() as cur:
             cur.execute("DELETE FROM holdings WHERE snapshot_date = %s", (today,))
             deleted = cur.rowcount
-        conn.commit()
-        print(f"      오늘({today}) 기존 데이터 삭제: {deleted}건")
+        logger.info("      오늘(%s) 기존 데이터 삭제: %s건", today, deleted)
 
         holdings_count = sync_holdings_from_kis(conn, client, today)
         results["holdings"] = holdings_count
-        print(f"      새로 동기화: {holdings_count}건")
+        logger.info("      새로 동기화: %s건", holdings_count)
 
         # ============================================================
         # 4단계: 계좌요약 재계산
         # ============================================================
-        print("\n[4/4] 계좌요약(account_summary) 재계산...")
+        logger.info("\n[4/4] 계좌요약(account_summary) 재계산...")
         summary_count = sync_account_summary_from_kis(conn, client, today)
         results["account_summary"] = summary_count
-        print(f"      동기화 완료: {summary_count}건")
+        logger.info("      동기화 완료: %s건", summary_count)
 
         # ============================================================
         # 완료 요약
         # ============================================================
-        print("\n" + "=" * 60)
-        print("  DB 재구성 완료!")
-        print("=" * 60)
-        print(f"  - 거래내역: {trades_count}건")
-        print(f"  - 보유종목: {holdings_count}건")
-        print(f"  - 계좌요약: {summary_count}건")
+        logger.info("\n" + "=" * 60)
+        logger.info("  DB 재구성 완료!")
+        logger.info("=" * 60)
+        logger.info("  - 거래내역: %s건", trades_count)
+        logger.info("  - 보유종목: %s건", holdings_count)
+        logger.info("  - 계좌요약: %s건", summary_count)
         if clear_derived:
-            print(f"  - 파생테이블: 초기화됨 (daily_lots, portfolio_snapshot, daily_portfolio_snapshot)")
-        print("=" * 60)
+            logger.info("  - 파생테이블: 초기화됨 (daily_lots, portfolio_snapshot, daily_portfolio_snapshot)")
+        logger.info("=" * 60)
 
         return results
 
     except Exception as e:
-        print(f"\n[ERROR] DB 재구성 실패: {e}")
+        logger.error("\n[ERROR] DB 재구성 실패: %s", e)
         raise
     finally:
         conn.close()
@@ -610,18 +703,17 @@ def reconstruct_historical_cash(start_date: str = "20260201") -> int:
     Returns:
         업데이트된 레코드 수
     """
-    import requests
-
+    start_dt = _to_date(start_date)
     conn = get_connection()
-    client = KISAPIClient()
+    client = _get_client()
 
     try:
-        print("=" * 60)
-        print("  과거 현금 잔고 역산")
-        print("=" * 60)
+        logger.info("=" * 60)
+        logger.info("  과거 현금 잔고 역산")
+        logger.info("=" * 60)
 
         # 1. 현재 현금 잔고 조회
-        print("\n[1] 현재 현금 잔고 조회...")
+        logger.info("\n[1] 현재 현금 잔고 조회...")
         current_cash = 0.0
         try:
             url = f"{client.base_url}/uapi/overseas-stock/v1/trading/inquire-psamount"
@@ -634,87 +726,83 @@ def reconstruct_historical_cash(start_date: str = "20260201") -> int:
                 "ITEM_CD": "AAPL",
             }
             client._wait_for_rate_limit()
-            response = requests.get(url, headers=headers, params=params)
+            response = client._session.get(url, headers=headers, params=params)
             data = response.json()
             if data.get("rt_cd") == "0":
                 output = data.get("output", {})
                 current_cash = float(output.get("ord_psbl_frcr_amt", 0) or 0)
-                print(f"      현재 현금: ${current_cash:,.2f}")
+                logger.info("      현재 현금: $%s", format(current_cash, ",.2f"))
         except Exception as e:
-            print(f"[ERROR] 현금 조회 실패: {e}")
+            logger.error("[ERROR] 현금 조회 실패: %s", e)
             return 0
 
-        # 2. 날짜별 거래 금액 집계
-        print("\n[2] 날짜별 거래 금액 집계...")
+        # 2. 날짜별 거래 금액 집계 (매수/매도를 한 쿼리에서 pivot)
+        # 매매구분은 부분 문자열로 판별 (lot_service._is_buy/_is_sell과 동일: '매수'가 우선)
+        logger.info("\n[2] 날짜별 거래 금액 집계...")
         with conn.cursor() as cur:
             cur.execute("""
-                SELECT trade_date, io_tp_nm, SUM(cntr_qty * cntr_uv) as total_amount
+                SELECT trade_date,
+                       SUM(CASE WHEN io_tp_nm LIKE '%%매수%%'
+                                THEN cntr_qty * cntr_uv ELSE 0 END),
+                       SUM(CASE WHEN io_tp_nm LIKE '%%매도%%' AND io_tp_nm NOT LIKE '%%매수%%'
+                                THEN cntr_qty * cntr_uv ELSE 0 END)
                 FROM account_trade_history
                 WHERE trade_date >= %s
-                GROUP BY trade_date, io_tp_nm
-                ORDER BY trade_date DESC
-            """, (f"{start_date[:4]}-{start_date[4:6]}-{start_date[6:8]}",))
-
-            trades_by_date = {}
-            for row in cur.fetchall():
-                dt = row[0]
-                io_type = row[1]
-                amount = float(row[2]) if row[2] else 0
-                if dt not in trades_by_date:
-                    trades_by_date[dt] = {"buy": 0.0, "sell": 0.0}
-                if "매수" in str(io_type):
-                    trades_by_date[dt]["buy"] = amount
-                elif "매도" in str(io_type):
-                    trades_by_date[dt]["sell"] = amount
+                GROUP BY trade_date
+            """, (start_dt,))
+            # {trade_date: (매수금액, 매도금액)}
+            trades_by_date = {
+                row[0]: (float(row[1] or 0), float(row[2] or 0))
+                for row in cur.fetchall()
+            }
 
         # 3. 날짜별 현금 역산 및 업데이트
-        print("\n[3] 과거 현금 역산 및 account_summary 업데이트...")
+        logger.info("\n[3] 과거 현금 역산 및 account_summary 업데이트...")
         today = date.today()
-        start_dt = date(int(start_date[:4]), int(start_date[4:6]), int(start_date[6:8]))
 
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT snapshot_date, aset_evlt_amt
+                FROM account_summary
+                WHERE snapshot_date BETWEEN %s AND %s
+                ORDER BY snapshot_date DESC
+            """, (start_dt, today))
+            summaries = cur.fetchall()
+
+        # 오늘부터 거꾸로: 어떤 날짜의 현금 = 현재 현금 + 그 이후 날짜들의 (매수 - 매도)
+        # 역산: 매수했으면 현금이 더 많았고, 매도했으면 현금이 더 적었음
+        trade_dates = sorted((d for d in trades_by_date if d <= today), reverse=True)
         cash = current_cash
-        updated_count = 0
-        current_dt = today
-
-        while current_dt >= start_dt:
-            # account_summary에 이 날짜 레코드가 있는지 확인
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT aset_evlt_amt, invt_bsamt FROM account_summary WHERE snapshot_date = %s",
-                    (current_dt,)
-                )
-                row = cur.fetchone()
-
-            if row:
-                aset_evlt = float(row[0]) if row[0] else 0
-                invt_bsamt = float(row[1]) if row[1] else 0
-                total_assets = cash + aset_evlt
-
-                # 업데이트
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        UPDATE account_summary
-                        SET cash_balance = %s, tot_est_amt = %s
-                        WHERE snapshot_date = %s
-                    """, (cash, total_assets, current_dt))
-                conn.commit()
-
-                print(f"      {current_dt}: cash=${cash:,.2f}, stock=${aset_evlt:,.2f}, total=${total_assets:,.2f}")
-                updated_count += 1
-
-            # 전날 현금 계산 (역산)
-            if current_dt in trades_by_date:
-                day_trades = trades_by_date[current_dt]
-                # 역산: 매수했으면 현금이 더 많았고, 매도했으면 현금이 더 적었음
-                cash = cash + day_trades["buy"] - day_trades["sell"]
+        i = 0
+        update_rows = []
+        for snapshot_date, aset_evlt_amt in summaries:
+            while i < len(trade_dates) and trade_dates[i] > snapshot_date:
+                buy_amount, sell_amount = trades_by_date[trade_dates[i]]
+                cash = cash + buy_amount - sell_amount
+                i += 1
+
+            aset_evlt = float(aset_evlt_amt) if aset_evlt_amt else 0
+            total_assets = cash + aset_evlt
+            update_rows.append((cash, total_assets, snapshot_date))
+            logger.info(
+                "      %s: cash=$%s, stock=$%s, total=$%s",
+                snapshot_date, format(cash, ",.2f"), format(aset_evlt, ",.2f"), format(total_assets, ",.2f"),
+            )
 
-            current_dt -= timedelta(days=1)
+        with conn.cursor() as cur:
+            cur.executemany("""
+                UPDATE account_summary
+                SET cash_balance = %s, tot_est_amt = %s
+                WHERE snapshot_date = %s
+            """, update_rows)
+        conn.commit()
+        updated_count = len(update_rows)
 
-        print(f"\n[OK] {updated_count}개 레코드 업데이트 완료")
+        logger.info("\n[OK] %s개 레코드 업데이트 완료", updated_count)
         return updated_count
 
     except Exception as e:
-        print(f"\n[ERROR] 역산 실패: {e}")
+        logger.error("\n[ERROR] 역산 실패: %s", e)
         raise
     finally:
         conn.close()
@@ -725,9 +813,9 @@ def show_db_status():
     conn = get_connection()
 
     try:
-        print("\n" + "=" * 60)
-        print("  현재 DB 상태")
-        print("=" * 60)
+        logger.info("\n" + "=" * 60)
+        logger.info("  현재 DB 상태")
+        logger.info("=" * 60)
 
         # 테이블명, 설명, 날짜컬럼
         tables = [
@@ -739,19 +827,23 @@ def show_db_status():
             ("daily_portfolio_snapshot", "일별 포트폴리오", "snapshot_date"),
         ]
 
+        # 건수와 날짜 범위를 테이블별 쿼리 대신 한 번에 조회
+        status_sql = " UNION ALL ".join(
+            f"SELECT '{table}', COUNT(*), MIN({date_col}), MAX({date_col}) FROM {table}"
+            for table, _, date_col in tables
+        )
+
         with conn.cursor() as cur:
-            for table, desc, date_col in tables:
-                cur.execute(f"SELECT COUNT(*) FROM {table}")
-                count = cur.fetchone()[0]
+            cur.execute(status_sql)
+            stats = {row[0]: row[1:] for row in cur.fetchall()}
 
-                # 날짜 범위 확인
-                cur.execute(f"SELECT MIN({date_col}), MAX({date_col}) FROM {table}")
-                row = cur.fetchone()
-                date_range = f"{row[0]} ~ {row[1]}" if row[0] else "N/A"
+        for table, desc, _ in tables:
+            count, min_date, max_date = stats[table]
+            date_range = f"{min_date} ~ {max_date}" if min_date else "N/A"
 
-                print(f"  {desc:20} ({table:30}): {count:>6}건  [{date_range}]")
+            logger.info("  %-20s (%-30s): %6s건  [%s]", desc, table, count, date_range)
 
-        print("=" * 60)
+        logger.info("=" * 60)
 
     finally:
         conn.close()
@@ -2,24 +2,98 @@
 Korea Investment & Securities API Client for overseas stocks.
 """
 
+import hashlib
 import json
+import threading
 import time
 import requests
 from datetime import datetime
 from pathlib import Path
-from config.settings import Settings
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+from config.settings import get_settings
 
 # 토큰 캐시 파일 경로
 TOKEN_CACHE_FILE = Path(__file__).resolve().parent.parent / ".token_cache.json"
 
+# 조회(GET) 응답 캐시 디렉터리 (--record로 저장, --from-cache로 재실행)
+KIS_CACHE_DIR = Path(__file__).resolve().parent.parent / "cache" / "kis"
+
+
+def _response_cache_path(url, params=None, headers=None) -> Path:
+    """Cache file for a GET request, keyed by endpoint, TR id/continuation and params."""
+    headers = headers or {}
+    key = json.dumps(
+        [urlsplit(url).path, headers.get("tr_id", ""), headers.get("tr_cont", ""),
+         sorted((params or {}).items())],
+        ensure_ascii=False,
+    )
+    return KIS_CACHE_DIR / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+
+class _RecordingSession(requests.Session):
+    """requests.Session that saves successful GET responses to KIS_CACHE_DIR."""
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        response = super().request(method, url, params=params, headers=headers, **kwargs)
+        if method.upper() == "GET" and response.status_code == 200:
+            try:
+                cache_file = _response_cache_path(url, params, headers)
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(cache_file, "w", encoding="utf-8") as f:
+                    json.dump({"tr_cont": response.headers.get("tr_cont", ""), "text": response.text}, f)
+            except Exception:
+                pass  # 캐시 저장 실패 시 무시
+        return response
+
+
+class _CachedResponse:
+    """Minimal stand-in for requests.Response built from a cache file."""
+
+    status_code = 200
+
+    def __init__(self, cached: dict):
+        self.text = cached["text"]
+        self.headers = CaseInsensitiveDict({"tr_cont": cached["tr_cont"]})
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class KISCacheMissError(Exception):
+    """A replayed KIS request has no recorded response (CachedKISClient)."""
+
+
+class _ReplaySession:
+    """Serves GET requests from KIS_CACHE_DIR without touching the network."""
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        cache_file = _response_cache_path(url, params, headers)
+        if not cache_file.exists():
+            raise KISCacheMissError(
+                f"No cached KIS response for {urlsplit(url).path} (run once with --record first)"
+            )
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return _CachedResponse(json.load(f))
+
+    def post(self, url, **kwargs):
+        raise KISCacheMissError(f"KIS POST {urlsplit(url).path} is not available from cache")
+
 
 class KISAPIClient:
     """
     API client for Korea Investment & Securities overseas stock trading.
+
+    Args:
+        record: Save successful GET responses under KIS_CACHE_DIR so a later
+                run can replay them with CachedKISClient. Off by default
+                (the files contain account data).
     """
 
-    def __init__(self):
-        self.settings = Settings()
+    def __init__(self, record: bool = False):
+        self.settings = get_settings()
         self.base_url = self.settings.BASE_URL
         self.app_key = self.settings.APP_KEY
         self.app_secret = self.settings.SECRET_KEY
@@ -30,6 +104,16 @@ class KISAPIClient:
         self._token_expired = None
         self._last_call_time = 0
         self._min_interval = 0.5  # 0.5초 간격
+        self._rate_lock = threading.Lock()  # 여러 스레드가 같은 클라이언트를 쓸 때 호출 슬롯 예약용
+
+        # Keep-alive 세션: 호출마다 TCP/TLS 핸드셰이크를 반복하지 않도록 커넥션 재사용
+        # (Retry는 기본적으로 멱등 메서드만 재시도하므로 주문 POST는 재전송되지 않음)
+        self._session = _RecordingSession() if record else requests.Session()
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+        ))
 
         # 파일에서 캐시된 토큰 로드
         self._load_token_cache()
@@ -60,11 +144,13 @@ class KISAPIClient:
             pass  # 캐시 저장 실패 시 무시
 
     def _wait_for_rate_limit(self):
-        """API 호출 간 최소 간격 유지"""
-        elapsed = time.time() - self._last_call_time
-        if elapsed < self._min_interval:
-            time.sleep(self._min_interval - elapsed)
-        self._last_call_time = time.time()
+        """API 호출 간 최소 간격 유지 (스레드 안전: 락 안에서 다음 호출 시각만 예약하고 대기는 락 밖에서)"""
+        with self._rate_lock:
+            now = time.monotonic()
+            call_time = max(now, self._last_call_time + self._min_interval)
+            self._last_call_time = call_time
+        if call_time > now:
+            time.sleep(call_time - now)
 
     def get_access_token(self):
         """
@@ -93,7 +179,7 @@ class KISAPIClient:
 
         self._wait_for_rate_limit()
 
-        response = requests.post(url, headers=headers, data=json.dumps(body))
+        response = self._session.post(url, headers=headers, data=json.dumps(body))
 
         # 토큰 발급 제한 에러 (1분당 1회) - 기존 캐시된 토큰 사용
         if response.status_code == 403:
@@ -181,7 +267,7 @@ class KISAPIClient:
 
             self._wait_for_rate_limit()
 
-            response = requests.get(url, headers=headers, params=params)
+            response = self._session.get(url, headers=headers, params=params)
 
             if response.status_code != 200:
                 raise Exception(f"Holdings request failed: {response.status_code} - {response.text}")
@@ -267,7 +353,7 @@ class KISAPIClient:
 
         self._wait_for_rate_limit()
 
-        response = requests.get(url, headers=headers, params=params)
+        response = self._session.get(url, headers=headers, params=params)
 
         if response.status_code != 200:
             raise Exception(f"Balance request failed: {response.status_code} - {response.text}")
@@ -348,7 +434,7 @@ class KISAPIClient:
 
             self._wait_for_rate_limit()
 
-            response = requests.get(url, headers=headers, params=params)
+            response = self._session.get(url, headers=headers, params=params)
 
             if response.status_code != 200:
                 raise Exception(f"Trade history request failed: {response.status_code} - {response.text}")
@@ -406,7 +492,7 @@ class KISAPIClient:
 
         self._wait_for_rate_limit()
 
-        response = requests.get(url, headers=headers, params=params)
+        response = self._session.get(url, headers=headers, params=params)
 
         if response.status_code != 200:
             raise Exception(f"Price request failed: {response.status_code} - {response.text}")
@@ -461,7 +547,7 @@ class KISAPIClient:
 
         self._wait_for_rate_limit()
 
-        response = requests.get(url, headers=headers, params=params)
+        response = self._session.get(url, headers=headers, params=params)
 
         if response.status_code != 200:
             raise Exception(f"Daily price request failed: {response.status_code}")
@@ -512,7 +598,7 @@ class KISAPIClient:
 
         self._wait_for_rate_limit()
 
-        response = requests.get(url, headers=headers, params=params)
+        response = self._session.get(url, headers=headers, params=params)
 
         if response.status_code != 200:
             raise Exception(f"Buying power request failed: {response.status_code} - {response.text}")
@@ -563,7 +649,7 @@ class KISAPIClient:
 
         self._wait_for_rate_limit()
 
-        response = requests.post(url, headers=headers, data=json.dumps(body))
+        response = self._session.post(url, headers=headers, data=json.dumps(body))
 
         if response.status_code != 200:
             raise Exception(f"Buy order failed: {response.status_code} - {response.text}")
@@ -614,7 +700,7 @@ class KISAPIClient:
 
         self._wait_for_rate_limit()
 
-        response = requests.post(url, headers=headers, data=json.dumps(body))
+        response = self._session.post(url, headers=headers, data=json.dumps(body))
 
         if response.status_code != 200:
             raise Exception(f"Sell order failed: {response.status_code} - {response.text}")
@@ -656,7 +742,7 @@ class KISAPIClient:
 
         self._wait_for_rate_limit()
 
-        response = requests.get(url, headers=headers, params=params)
+        response = self._session.get(url, headers=headers, params=params)
 
         if response.status_code != 200:
             raise Exception(f"Pending orders request failed: {response.status_code} - {response.text}")
@@ -669,6 +755,26 @@ class KISAPIClient:
         return data.get("output", [])
 
 
+class CachedKISClient(KISAPIClient):
+    """
+    KISAPIClient that replays the last recorded GET responses instead of calling KIS.
+
+    A KISAPIClient created with record=True (the cron scripts' --record flag)
+    saves its successful GET responses under KIS_CACHE_DIR; this client serves
+    the same requests from those files (no network, no rate-limit wait). Used
+    by the cron scripts' --from-cache flag for development/debug runs.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._session = _ReplaySession()
+        self._min_interval = 0
+
+    def get_access_token(self):
+        """No token request in cache mode; the cached token (if any) is only used in headers."""
+        return self._access_token or ""
+
+
 # 테스트용 코드
 if __name__ == "__main__":
     client = KISAPIClient()
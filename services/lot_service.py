@@ -27,6 +27,7 @@ def construct_daily_lots(
     conn: pymysql.connections.Connection,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    commit: bool = True,
 ) -> None:
     """
     Construct daily lots from trade history.
@@ -35,6 +36,7 @@ def construct_daily_lots(
         conn: Database connection
         start_date: Start date (YYYY-MM-DD). If None, defaults to earliest trade.
         end_date: End date (YYYY-MM-DD). If None, processes up to today.
+        commit: Commit when done (False leaves the transaction to the caller)
     """
     where_clauses = []
     params: Dict[str, Any] = {}
@@ -92,11 +94,20 @@ def construct_daily_lots(
 
     # Process each group
     for (stock_code, crd_class, loan_dt, trade_date), group in grouped.items():
-        buys = [t for t in group if _is_buy(t["io_tp_nm"])]
-        sells = [t for t in group if _is_sell(t["io_tp_nm"])]
-
-        buy_qty = sum(t["cntr_qty"] or 0 for t in buys)
-        sell_qty = sum(t["cntr_qty"] or 0 for t in sells)
+        # 매수/매도 수량과 금액을 한 번의 순회로 집계
+        buy_qty = 0
+        sell_qty = 0
+        total_buy_value = Decimal(0)
+        total_sell_value = Decimal(0)
+
+        for t in group:
+            qty = t["cntr_qty"] or 0
+            if _is_buy(t["io_tp_nm"]):
+                buy_qty += qty
+                total_buy_value += Decimal(str(qty)) * Decimal(str(t["cntr_uv"] or 0))
+            elif _is_sell(t["io_tp_nm"]):
+                sell_qty += qty
+                total_sell_value += Decimal(str(qty)) * Decimal(str(t["cntr_uv"] or 0))
 
         stock_name = group[0]["stk_nm"]
         currency = group[0].get("currency", "USD")
@@ -108,10 +119,6 @@ def construct_daily_lots(
         if existing_qty > 0 and sell_qty > 0:
             close_qty = min(sell_qty, existing_qty)
 
-            total_sell_value = sum(
-                Decimal(str(t["cntr_qty"] or 0)) * Decimal(str(t["cntr_uv"] or 0))
-                for t in sells
-            )
             avg_sell_price = total_sell_value / Decimal(sell_qty) if sell_qty > 0 else Decimal(0)
 
             _reduce_lots_lifo(conn, stock_code, crd_class, loan_dt, close_qty, trade_date, avg_sell_price)
@@ -123,10 +130,6 @@ def construct_daily_lots(
 
         # Create new lot if net buy
         if net_buy > 0:
-            total_buy_value = sum(
-                Decimal(str(t["cntr_qty"] or 0)) * Decimal(str(t["cntr_uv"] or 0))
-                for t in buys
-            )
             avg_price = total_buy_value / Decimal(buy_qty) if buy_qty > 0 else Decimal(0)
             total_cost = avg_price * Decimal(net_buy)
 
@@ -146,7 +149,8 @@ def construct_daily_lots(
         elif net_buy < 0 and existing_qty == 0:
             print(f"Warning: Sold {abs(net_buy)} of {stock_code} without matching lots")
 
-    conn.commit()
+    if commit:
+        conn.commit()
 
 
 def _get_existing_lot_quantity(
@@ -301,27 +305,30 @@ def _reduce_lots_lifo(
         print(f"Warning: Sold {remaining} of {stock_code} without matching lots")
 
 
-def update_lot_metrics(conn: pymysql.connections.Connection, today: Optional[date] = None) -> int:
-    """Update metrics for all open lots."""
+def update_lot_metrics(
+    conn: pymysql.connections.Connection,
+    today: Optional[date] = None,
+    commit: bool = True,
+) -> int:
+    """Update metrics for all open lots (commit=False leaves the transaction open)."""
     if today is None:
         today = date.today()
 
-    # Get current prices from holdings
-    with conn.cursor(pymysql.cursors.DictCursor) as cur:
+    # Get current prices from holdings (zero/missing prices filtered in SQL)
+    with conn.cursor() as cur:
         cur.execute(
             """
-            SELECT stk_cd, crd_class, cur_prc
+            SELECT stk_cd, crd_class, MAX(cur_prc)
             FROM holdings
-            WHERE snapshot_date = %s
+            WHERE snapshot_date = %s AND cur_prc > 0
+            GROUP BY stk_cd, crd_class
             """,
             (today,),
         )
-        price_data = cur.fetchall()
-
-    prices: Dict[Tuple[str, str], Decimal] = {}
-    for row in price_data:
-        key = (row["stk_cd"], row["crd_class"])
-        prices[key] = Decimal(str(row["cur_prc"])) if row["cur_prc"] else Decimal(0)
+        prices: Dict[Tuple[str, str], Decimal] = {
+            (stk_cd, crd_class): Decimal(str(cur_prc))
+            for stk_cd, crd_class, cur_prc in cur.fetchall()
+        }
 
     # Get all open lots
     with conn.cursor(pymysql.cursors.DictCursor) as cur:
@@ -376,17 +383,70 @@ def update_lot_metrics(conn: pymysql.connections.Connection, today: Optional[dat
             )
             updated_count += 1
 
-    conn.commit()
+    if commit:
+        conn.commit()
+    return updated_count
+
+
+def update_lot_metrics_bulk(
+    conn: pymysql.connections.Connection,
+    today: Optional[date] = None,
+    commit: bool = True,
+) -> int:
+    """
+    Set-based version of update_lot_metrics: one UPDATE ... JOIN for all open lots.
+
+    Prices come from the same holdings snapshot (max cur_prc per stock/crd_class,
+    zero prices ignored); lots without a price get NULL metrics, as before.
+
+    Returns:
+        Number of rows changed (MySQL rowcount)
+    """
+    if today is None:
+        today = date.today()
+
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE daily_lots l
+            LEFT JOIN (
+                SELECT stk_cd, crd_class, MAX(cur_prc) AS cur_prc
+                FROM holdings
+                WHERE snapshot_date = %s AND cur_prc > 0
+                GROUP BY stk_cd, crd_class
+            ) p ON p.stk_cd = l.stock_code AND p.crd_class = l.crd_class
+            SET l.holding_days = DATEDIFF(%s, l.trade_date),
+                l.current_price = p.cur_prc,
+                l.unrealized_pnl = (p.cur_prc - l.avg_purchase_price) * l.net_quantity,
+                l.unrealized_return_pct = CASE
+                    WHEN p.cur_prc IS NULL THEN NULL
+                    WHEN l.avg_purchase_price > 0
+                        THEN (p.cur_prc - l.avg_purchase_price) / l.avg_purchase_price * 100
+                    ELSE 0
+                END,
+                l.updated_at = CURRENT_TIMESTAMP
+            WHERE l.is_closed = FALSE
+            """,
+            (today, today),
+        )
+        updated_count = cur.rowcount
+
+    if commit:
+        conn.commit()
     return updated_count
 
 
-def rebuild_daily_lots(conn: pymysql.connections.Connection) -> int:
+def rebuild_daily_lots(conn: pymysql.connections.Connection, commit: bool = True) -> int:
     """
     Clear all lots and reconstruct from trade history (account_trade_history).
 
     daily_lots is a derived table - trade history is the source of truth.
     This ensures lots perfectly reflect all buys and sells.
 
+    Args:
+        conn: Database connection
+        commit: Commit the clear and rebuild (False leaves the transaction to the caller)
+
     Returns:
         Number of open lots after rebuild
     """
@@ -394,11 +454,12 @@ def rebuild_daily_lots(conn: pymysql.connections.Connection) -> int:
     with conn.cursor() as cur:
         cur.execute("DELETE FROM daily_lots")
         deleted = cur.rowcount
-    conn.commit()
+    if commit:
+        conn.commit()
     print(f"  Cleared {deleted} existing lots")
 
     # 2. Reconstruct from all trades
-    construct_daily_lots(conn)
+    construct_daily_lots(conn, commit=commit)
 
     # 3. Report results
     with conn.cursor() as cur:
@@ -6,6 +6,7 @@ Uses yfinance for free market data.
 from datetime import date, datetime, timedelta
 from typing import Optional
 
+import pandas as pd
 import pymysql
 
 
@@ -13,6 +14,7 @@ def sync_market_index(
     conn: pymysql.connections.Connection,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    commit: bool = True,
 ) -> int:
     """
     Sync S&P 500 and NASDAQ index data to database.
@@ -21,6 +23,7 @@ def sync_market_index(
         conn: Database connection
         start_date: Start date for sync (default: 30 days ago)
         end_date: End date for sync (default: today)
+        commit: Commit when done (False leaves the transaction to the caller)
 
     Returns:
         Number of records synced
@@ -44,6 +47,7 @@ def sync_market_index(
         end=end_date + timedelta(days=1),
         progress=False,
         auto_adjust=True,
+        threads=True,
     )
 
     if data.empty:
@@ -60,7 +64,6 @@ def sync_market_index(
         return 0
 
     # Build dicts by date
-    import pandas as pd
     all_dates = set()
     sp500_dict = {}
     nasdaq_dict = {}
@@ -103,27 +106,26 @@ def sync_market_index(
             updated_at = CURRENT_TIMESTAMP
     """
 
-    count = 0
+    rows = []
+    for d in sorted(all_dates):
+        sp500_data = sp500_dict.get(d, {})
+        nasdaq_data = nasdaq_dict.get(d, {})
+        rows.append((
+            d,
+            sp500_data.get("close"),
+            sp500_data.get("change"),
+            sp500_data.get("change_pct"),
+            nasdaq_data.get("close"),
+            nasdaq_data.get("change"),
+            nasdaq_data.get("change_pct"),
+        ))
+
     with conn.cursor() as cur:
-        for d in sorted(all_dates):
-            sp500_data = sp500_dict.get(d, {})
-            nasdaq_data = nasdaq_dict.get(d, {})
-
-            cur.execute(
-                insert_sql,
-                (
-                    d,
-                    sp500_data.get("close"),
-                    sp500_data.get("change"),
-                    sp500_data.get("change_pct"),
-                    nasdaq_data.get("close"),
-                    nasdaq_data.get("change"),
-                    nasdaq_data.get("change_pct"),
-                ),
-            )
-            count += 1
-
-    conn.commit()
+        cur.executemany(insert_sql, rows)
+    count = len(rows)
+
+    if commit:
+        conn.commit()
     print(f"Synced {count} market index records from {start_date} to {end_date}")
     return count
 
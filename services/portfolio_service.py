@@ -12,6 +12,7 @@ import pymysql
 def create_portfolio_snapshot(
     conn: pymysql.connections.Connection,
     snapshot_date: Optional[date] = None,
+    commit: bool = True,
 ) -> int:
     """
     Create a daily portfolio snapshot from holdings.
@@ -19,6 +20,7 @@ def create_portfolio_snapshot(
     Args:
         conn: Database connection
         snapshot_date: Date for the snapshot. If None, uses today.
+        commit: Commit when done (False leaves the transaction to the caller)
 
     Returns:
         Number of snapshot records created
@@ -137,7 +139,8 @@ def create_portfolio_snapshot(
             )
             count += 1
 
-    conn.commit()
+    if commit:
+        conn.commit()
     return count
 
 
@@ -211,6 +214,7 @@ def get_position_summary(
 def create_daily_portfolio_snapshot(
     conn: pymysql.connections.Connection,
     snapshot_date: Optional[date] = None,
+    commit: bool = True,
 ) -> bool:
     """
     Create a daily portfolio summary snapshot for TWR/MWR calculations.
@@ -220,6 +224,7 @@ def create_daily_portfolio_snapshot(
     Args:
         conn: Database connection
         snapshot_date: Date for the snapshot. If None, uses today.
+        commit: Commit when done (False leaves the transaction to the caller)
 
     Returns:
         True if snapshot was created, False otherwise
@@ -335,5 +340,6 @@ def create_daily_portfolio_snapshot(
             ),
         )
 
-    conn.commit()
+    if commit:
+        conn.commit()
     return True
@@ -4,7 +4,6 @@
 """
 
 import sys
-import requests
 from datetime import datetime
 from pathlib import Path
 from zoneinfo import ZoneInfo
@@ -17,6 +16,9 @@ from services.kis_service import KISAPIClient
 ET  = ZoneInfo("America/New_York")
 KST = ZoneInfo("Asia/Seoul")
 
+# 보유종목 행 포맷 (행마다 f-string을 새로 해석하지 않도록 미리 바인딩)
+_HOLDING_ROW = "{:<8} {:>5} ${:>9,.2f} ${:>9,.2f} ${:>11,.2f} {:>12} {:>9}".format
+
 
 def fmt_usd(val, sign=False):
     if val is None:
@@ -47,7 +49,7 @@ def get_cash_balance(client: KISAPIClient):
         "ITEM_CD": "AAPL",
     }
     client._wait_for_rate_limit()
-    response = requests.get(url, headers=headers, params=params)
+    response = client._session.get(url, headers=headers, params=params)
     data = response.json()
     if data.get("rt_cd") != "0":
         raise Exception(f"Cash API error: {data.get('msg1')}")
@@ -95,6 +97,7 @@ def main():
         total_cost = 0.0
         total_mkt  = 0.0
         total_pnl  = 0.0
+        rows = []
 
         for h in holdings:
             ticker  = h.get("ovrs_pdno", "")
@@ -110,12 +113,10 @@ def main():
             total_mkt  += mkt_val
             total_pnl  += pnl
 
-            print(f"{ticker:<8} {qty:>5} "
-                  f"${avg:>9,.2f} ${cur:>9,.2f} "
-                  f"${mkt_val:>11,.2f} "
-                  f"{fmt_usd(pnl, sign=True):>12} "
-                  f"{fmt_pct(pnl_pct):>9}")
+            rows.append(_HOLDING_ROW(ticker, qty, avg, cur, mkt_val,
+                                     fmt_usd(pnl, sign=True), fmt_pct(pnl_pct)))
 
+        print("\n".join(rows))
         print("-" * 72)
         # frcr_buy_amt_smtl1이 0인 경우 평가금액-손익으로 역산
         if total_cost == 0 and total_mkt > 0:
@@ -4,13 +4,18 @@ View portfolio snapshots and position details.
 """
 
 import argparse
+import io
 import sys
+from contextlib import redirect_stdout
 from datetime import date, datetime
 from typing import Optional
 
 from db.connection import get_connection
 from services.lot_service import get_open_lots, rebuild_daily_lots, update_lot_metrics
 
+# 포트폴리오 표 행 포맷 (헤더/종목/합계 공용, 미리 바인딩해 재사용)
+_PORTFOLIO_ROW = "{:<8} {:>5} {:>10} {:>10} {:>12} {:>12} {:>10}".format
+
 
 def format_number(value, decimals=0):
     """Format number with thousand separators."""
@@ -59,7 +64,7 @@ def view_portfolio():
         print("=" * 95)
 
         # Table header ($ in labels only)
-        print(f"\n{'Ticker':<8} {'Qty':>5} {'Avg($)':>10} {'Cur($)':>10} {'Value($)':>12} {'P&L($)':>12} {'Return':>10}")
+        print("\n" + _PORTFOLIO_ROW("Ticker", "Qty", "Avg($)", "Cur($)", "Value($)", "P&L($)", "Return"))
         print("-" * 95)
 
         total_cost = 0
@@ -88,17 +93,17 @@ def view_portfolio():
             total_market_value += market_value
             total_pnl += pnl
 
-            print(f"{display_name:<8} {qty:>5} "
-                  f"{format_currency(avg_cost):>10} {format_currency(current):>10} "
-                  f"{format_currency(market_value):>12} {format_currency(pnl, show_sign=True):>12} "
-                  f"{format_percentage(return_pct):>10}")
+            print(_PORTFOLIO_ROW(display_name, qty,
+                                 format_currency(avg_cost), format_currency(current),
+                                 format_currency(market_value), format_currency(pnl, show_sign=True),
+                                 format_percentage(return_pct)))
 
         # Summary
         print("-" * 95)
         total_return_pct = (total_pnl / total_cost * 100) if total_cost > 0 else 0
-        print(f"{'TOTAL':<8} {'':<5} {'':>10} {'':>10} "
-              f"{format_currency(total_market_value):>12} {format_currency(total_pnl, show_sign=True):>12} "
-              f"{format_percentage(total_return_pct):>10}")
+        print(_PORTFOLIO_ROW("TOTAL", "", "", "",
+                             format_currency(total_market_value), format_currency(total_pnl, show_sign=True),
+                             format_percentage(total_return_pct)))
 
         print("\n" + "=" * 95)
         print(f"Total Value:   ${format_currency(total_market_value)}")
@@ -211,6 +216,23 @@ def rebuild_lots():
         conn.close()
 
 
+def render_buffered(view, *args):
+    """
+    Render a view into a buffer and write it to stdout in a single call.
+
+    Args:
+        view: View function that prints its report
+        *args: Arguments passed to the view
+    """
+    out = io.StringIO()
+    try:
+        with redirect_stdout(out):
+            view(*args)
+    finally:
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
+
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -241,9 +263,9 @@ Examples:
     if args.rebuild:
         rebuild_lots()
     elif args.stock:
-        view_position_detail(args.stock)
+        render_buffered(view_position_detail, args.stock)
     else:
-        view_portfolio()
+        render_buffered(view_portfolio)
 
 
 if __name__ == "__main__":